@@ -6,9 +6,41 @@ Based on industry-standard naming conventions and best practices
 """
 
 import re
+import sys
+import hashlib
+import importlib.util
+from collections import Counter
+from functools import lru_cache
 from typing import List, Dict, Any, Optional, Tuple
 import pandas as pd
 
+# Optional: pypinyin spells unmatched names in pinyin (imported on first use,
+# loading its dictionary takes a few hundred milliseconds)
+PYPINYIN_AVAILABLE = importlib.util.find_spec('pypinyin') is not None
+
+# Optional: RE2 pattern set matches all keyword patterns in one linear-time pass
+try:
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
+
+# Precompiled patterns used on every analyzed field
+_DATETIME_PATTERNS = [
+    re.compile(r'\d{4}[-/]\d{1,2}[-/]\d{1,2}'),  # YYYY-MM-DD or YYYY/MM/DD
+    re.compile(r'\d{1,2}[-/]\d{1,2}[-/]\d{4}'),  # DD-MM-YYYY or MM/DD/YYYY
+    re.compile(r'\d{4}\d{2}\d{2}'),              # YYYYMMDD
+]
+_BOOLEAN_INDICATORS = frozenset({'是', '否', 'y', 'n', 'yes', 'no', 'true', 'false', '0', '1', 't', 'f'})
+# Name keywords that allow a string field to become a number from samples
+_NUMBER_KEYWORDS = ('金额', '保费', '费用', '赔款', '价格', '数量', '次数', '频度',
+                    '评分', '率', '系数', '折扣', '吨位', '座位', '排量', '功率',
+                    '车龄', '笔数', '比例')
+_NON_ALNUM_RUN_RE = re.compile(r'[^a-z0-9]+')
+
+# Keys written for each field in field_mappings/*.json
+_CONFIG_KEYS = ('en_name', 'group', 'dtype', 'description')
+
 
 class AIFieldMapper:
     """
@@ -26,6 +58,10 @@ class AIFieldMapper:
         self._init_exact_mappings()
         self._init_keyword_patterns()
         self._init_business_groups()
+        self._init_keyword_map()
+
+        # Name-only mapping is reused for repeated field names
+        self._map_field_name = lru_cache(maxsize=4096)(self._map_field_name)
 
     def _init_exact_mappings(self):
         """Exact match mappings for common insurance fields"""
@@ -177,6 +213,17 @@ class AIFieldMapper:
             '风险等级': ('risk_level', 'general', 'string'),
         }
 
+        # Prebuilt exact-match results with interned strings
+        self.exact_results = {
+            cn: {
+                'en_name': sys.intern(en_name),
+                'group': sys.intern(group),
+                'dtype': sys.intern(dtype),
+                'description': f"{cn} (exact match)"
+            }
+            for cn, (en_name, group, dtype) in self.exact_mappings.items()
+        }
+
     def _init_keyword_patterns(self):
         """Keyword patterns for fuzzy matching with priority order"""
         # Format: (pattern, priority, (group, dtype, en_term))
@@ -269,6 +316,23 @@ class AIFieldMapper:
         # Sort by priority (highest first)
         self.keyword_patterns.sort(key=lambda x: x[1], reverse=True)
 
+        # Compile once; analyze_field reuses the compiled patterns
+        self.keyword_patterns = [
+            (re.compile(pattern), priority, payload)
+            for pattern, priority, payload in self.keyword_patterns
+        ]
+
+        # Bound search methods with their payloads for the sequential fallback scan
+        self.keyword_matchers = [(pattern.search, payload) for pattern, _, payload in self.keyword_patterns]
+
+        # RE2 set reports every pattern that matches; None when re2 is unavailable
+        self.keyword_pattern_set = None
+        if RE2_AVAILABLE:
+            self.keyword_pattern_set = re2.Set.SearchSet()
+            for pattern, _, _ in self.keyword_patterns:
+                self.keyword_pattern_set.Add(pattern.pattern)
+            self.keyword_pattern_set.Compile()
+
     def _init_business_groups(self):
         """Business group definitions"""
         self.business_groups = {
@@ -283,13 +347,10 @@ class AIFieldMapper:
             'general': 'General fields'
         }
 
-    def _translate_keywords(self, field_name: str) -> List[str]:
-        """
-        Translate Chinese keywords to English terms
-        Returns list of English tokens in order
-        """
+    def _init_keyword_map(self):
+        """Chinese keyword to English term dictionary used by _translate_keywords"""
         # Comprehensive keyword dictionary
-        keyword_map = {
+        self.keyword_map = {
             # Numbers and identifiers
             '保单号': 'policy_number',
             '批单号': 'endorsement_number',
@@ -448,28 +509,53 @@ class AIFieldMapper:
             '笔数': 'count',
         }
 
+        # Keys sorted by length (longest first) for greedy matching
+        self.sorted_keywords = sorted(self.keyword_map.keys(), key=len, reverse=True)
+
+    def _translate_keywords(self, field_name: str) -> List[str]:
+        """
+        Translate Chinese keywords to English terms
+        Returns list of English tokens in order
+        """
         tokens = []
         remaining = field_name
 
-        # Sort keys by length (longest first) for greedy matching
-        sorted_keys = sorted(keyword_map.keys(), key=len, reverse=True)
-
-        for keyword in sorted_keys:
+        for keyword in self.sorted_keywords:
             if keyword in remaining:
                 # Found a match
-                en_term = keyword_map[keyword]
+                en_term = self.keyword_map[keyword]
                 if en_term not in tokens:  # Avoid duplicates
                     tokens.append(en_term)
                 remaining = remaining.replace(keyword, '', 1)
 
         return tokens
 
+    @staticmethod
+    def _spell_pinyin(field_name: str) -> str:
+        """Pinyin spelling of a field name as [a-z0-9] only; '' when pypinyin is unavailable"""
+        if not PYPINYIN_AVAILABLE:
+            return ''
+        from pypinyin import lazy_pinyin
+        return _NON_ALNUM_RUN_RE.sub('', ''.join(lazy_pinyin(field_name)).lower())
+
+    @staticmethod
+    def _dtype_from_pandas(dtype) -> Optional[str]:
+        """Standard type for a typed pandas column, or None for object/string columns"""
+        if pd.api.types.is_bool_dtype(dtype):
+            return 'boolean'
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            return 'datetime'
+        if pd.api.types.is_numeric_dtype(dtype):
+            return 'number'
+        return None
+
     def _infer_type_from_samples(self, sample_values: List[Any]) -> str:
         """Infer data type from sample values"""
         if not sample_values:
             return 'string'
 
-        non_null = [v for v in sample_values if pd.notna(v)]
+        # Callers usually pass non-null samples; v == v drops NaN/NaT without per-value pandas calls
+        non_null = [v for v in sample_values if v is not None and v is not pd.NA and v == v]
         if not non_null:
             return 'string'
 
@@ -477,97 +563,62 @@ class AIFieldMapper:
         sample_str = str(non_null[0])
 
         # Check for datetime patterns
-        datetime_patterns = [
-            r'\d{4}[-/]\d{1,2}[-/]\d{1,2}',  # YYYY-MM-DD or YYYY/MM/DD
-            r'\d{1,2}[-/]\d{1,2}[-/]\d{4}',  # DD-MM-YYYY or MM/DD/YYYY
-            r'\d{4}\d{2}\d{2}',              # YYYYMMDD
-        ]
-        for pattern in datetime_patterns:
-            if re.search(pattern, sample_str):
+        for pattern in _DATETIME_PATTERNS:
+            if pattern.search(sample_str):
                 return 'datetime'
 
-        # Check for boolean
-        if len(set(str(v).strip() for v in non_null if pd.notna(v))) <= 3:
-            unique_vals = set(str(v).strip().lower() for v in non_null)
-            boolean_indicators = {'是', '否', 'y', 'n', 'yes', 'no', 'true', 'false', '0', '1', 't', 'f'}
-            if unique_vals.issubset(boolean_indicators):
-                return 'boolean'
+        # Check for boolean (stop collecting once there are more than 3 distinct values)
+        distinct = set()
+        for v in non_null:
+            distinct.add(str(v).strip())
+            if len(distinct) > 3:
+                break
+        if len(distinct) <= 3 and {v.lower() for v in distinct} <= _BOOLEAN_INDICATORS:
+            return 'boolean'
 
         # Check for number
-        try:
-            # Try to convert to number
-            numeric_count = 0
-            for v in non_null[:20]:  # Check first 20 values
-                v_str = str(v).strip().replace(',', '').replace('，', '')
-                try:
-                    float(v_str)
-                    numeric_count += 1
-                except:
-                    pass
-
-            if numeric_count / len(non_null[:20]) > 0.8:  # 80% are numbers
-                return 'number'
-        except:
-            pass
+        head = non_null[:20]  # Check first 20 values
+        numeric_count = 0
+        for v in head:
+            v_str = str(v).strip().replace(',', '').replace('，', '')
+            try:
+                float(v_str)
+                numeric_count += 1
+            except ValueError:
+                pass
+
+        if numeric_count / len(head) > 0.8:  # 80% are numbers
+            return 'number'
 
         return 'string'
 
-    def analyze_field(
-        self,
-        field_name: str,
-        sample_values: Optional[List[Any]] = None
-    ) -> Dict[str, str]:
+    def _map_field_name(self, field_name: str) -> Tuple[str, str, str, str]:
         """
-        Analyze a field and generate mapping suggestion
-
-        Args:
-            field_name: Chinese field name
-            sample_values: Sample data for type inference
+        Name-only part of analyze_field (no sample data involved)
 
         Returns:
-            {
-                'en_name': str,      # English field name
-                'group': str,        # Business group
-                'dtype': str,        # Data type
-                'description': str   # Description
-            }
+            (en_name, group, dtype, source) where source is 'exact' or 'pattern'
         """
         # Step 1: Check exact match first (highest priority)
-        if field_name in self.exact_mappings:
-            en_name, group, dtype = self.exact_mappings[field_name]
-            return {
-                'en_name': en_name,
-                'group': group,
-                'dtype': dtype,
-                'description': f"{field_name} (exact match)"
-            }
+        hit = self.exact_results.get(field_name)
+        if hit is not None:
+            return hit['en_name'], hit['group'], hit['dtype'], 'exact'
 
         # Step 2: Try keyword pattern matching
         group = 'general'
         dtype = 'string'
         en_term = None
 
-        for pattern, priority, (grp, dt, term) in self.keyword_patterns:
-            if re.search(pattern, field_name):
-                group = grp
-                dtype = dt
-                en_term = term
-                break  # Stop at first match (highest priority)
-
-        # Step 3: Refine type based on sample data
-        if sample_values and dtype != 'boolean':  # Boolean type is already very specific
-            inferred_type = self._infer_type_from_samples(sample_values)
-            # Only override if datetime or boolean detected
-            if inferred_type in ['datetime', 'boolean']:
-                dtype = inferred_type
-            # For number type, be more careful
-            elif inferred_type == 'number' and dtype == 'string':
-                # Check if field name suggests it should be a number
-                number_keywords = ['金额', '保费', '费用', '赔款', '价格', '数量', '次数', '频度',
-                                   '评分', '率', '系数', '折扣', '吨位', '座位', '排量', '功率',
-                                   '车龄', '笔数', '比例']
-                if any(kw in field_name for kw in number_keywords):
-                    dtype = 'number'
+        if self.keyword_pattern_set is not None:
+            hits = self.keyword_pattern_set.Match(field_name)
+            if hits:
+                # Lowest index = highest priority pattern that matched
+                group, dtype, en_term = self.keyword_patterns[min(hits)][2]
+        else:
+            for search, payload in self.keyword_matchers:
+                if search(field_name):
+                    group, dtype, en_term = payload
+                    break  # Stop at first match (highest priority)
 
         # Step 4: Generate English field name
         if en_term and not en_term.endswith('_'):
@@ -579,13 +630,17 @@ class AIFieldMapper:
             if tokens:
                 en_name = '_'.join(tokens)
             else:
-                # Fallback: use a descriptive name
-                en_name = f"field_{abs(hash(field_name)) % 10000}"
+                # Fallback: pinyin of the name, or a stable digest (same across processes)
+                spelled = self._spell_pinyin(field_name)
+                if spelled:
+                    en_name = f"field_{spelled}"
+                else:
+                    en_name = f"field_{hashlib.blake2b(field_name.encode('utf-8'), digest_size=4).hexdigest()}"
 
         # Step 5: Apply standard conventions
         # Ensure snake_case
-        en_name = re.sub(r'[^a-z0-9_]', '_', en_name.lower())
-        en_name = re.sub(r'_+', '_', en_name)  # Remove consecutive underscores
+        # Any run of non-alphanumerics (underscores included) becomes a single underscore
+        en_name = _NON_ALNUM_RUN_RE.sub('_', en_name.lower())
         en_name = en_name.strip('_')  # Remove leading/trailing underscores
 
         # Ensure reasonable length
@@ -597,6 +652,48 @@ class AIFieldMapper:
             else:
                 en_name = en_name[:50]
 
+        return en_name, group, dtype, 'pattern'
+
+    def analyze_field(
+        self,
+        field_name: str,
+        sample_values: Optional[List[Any]] = None,
+        dtype_hint: Optional[str] = None
+    ) -> Dict[str, str]:
+        """
+        Analyze a field and generate mapping suggestion
+
+        Args:
+            field_name: Chinese field name
+            sample_values: Sample data for type inference
+            dtype_hint: Type known from the column dtype ('number', 'datetime',
+                        'boolean'); used instead of inferring from samples
+
+        Returns:
+            {
+                'en_name': str,      # English field name
+                'group': str,        # Business group
+                'dtype': str,        # Data type
+                'description': str   # Description
+            }
+        """
+        # Steps 1, 2, 4, 5 depend only on the name (cached per instance)
+        en_name, group, dtype, source = self._map_field_name(field_name)
+        if source == 'exact':
+            return self.exact_results[field_name].copy()  # Callers may modify the returned dict
+
+        # Step 3: Refine type based on column dtype or sample data
+        if (dtype_hint or sample_values) and dtype != 'boolean':  # Boolean type is already very specific
+            inferred_type = dtype_hint or self._infer_type_from_samples(sample_values)
+            # Only override if datetime or boolean detected
+            if inferred_type in ['datetime', 'boolean']:
+                dtype = inferred_type
+            # For number type, be more careful
+            elif inferred_type == 'number' and dtype == 'string':
+                # Check if field name suggests it should be a number
+                if any(kw in field_name for kw in _NUMBER_KEYWORDS):
+                    dtype = 'number'
+
         return {
             'en_name': en_name,
             'group': group,
@@ -623,14 +720,35 @@ class AIFieldMapper:
         """
         mappings = {}
 
-        for field in unknown_fields:
+        # Analyze each distinct field once (first-occurrence order)
+        fields = list(dict.fromkeys(unknown_fields))
+
+        # One slice of the first rows for all sampled fields
+        head_rows = sample_size * 4
+        head_df = None
+        if df is not None:
+            head_df = df.head(head_rows)[[f for f in fields if f in df.columns]]
+
+        for field in fields:
             # Get sample values
             sample_values = None
-            if df is not None and field in df.columns:
-                sample_values = df[field].dropna().head(sample_size).tolist()
+            dtype_hint = None
+            if head_df is not None and field in head_df.columns:
+                col = head_df[field]
+                dtype_hint = self._dtype_from_pandas(col.dtype)
+                if dtype_hint is not None:
+                    # Typed column: no samples needed, only check that it has data
+                    if not (col.notna().any() or df[field].notna().any()):
+                        dtype_hint = None
+                else:
+                    head = col.dropna()
+                    if len(head) < sample_size and len(df) > head_rows:
+                        # Sparse column: scan the whole column
+                        head = df[field].dropna()
+                    sample_values = head.head(sample_size).tolist()
 
             # Analyze field
-            mapping = self.analyze_field(field, sample_values)
+            mapping = self.analyze_field(field, sample_values, dtype_hint)
             mappings[field] = mapping
 
         return mappings
@@ -642,15 +760,10 @@ class AIFieldMapper:
         Returns:
             Configuration dict compatible with field_mappings/*.json format
         """
-        config_mappings = {}
-
-        for cn_field, mapping in mappings.items():
-            config_mappings[cn_field] = {
-                'en_name': mapping['en_name'],
-                'group': mapping['group'],
-                'dtype': mapping['dtype'],
-                'description': mapping['description']
-            }
+        config_mappings = {
+            cn_field: {key: mapping[key] for key in _CONFIG_KEYS}
+            for cn_field, mapping in mappings.items()
+        }
 
         return {
             'domain': 'auto_learned',
@@ -693,13 +806,18 @@ if __name__ == '__main__':
 
     results = mapper.batch_analyze_fields(test_fields)
 
-    # Group by category
+    # Group by category and tally types/groups in the same pass
     by_group = {}
+    type_counts = Counter()
+    group_counts = Counter()
     for field, mapping in results.items():
         group = mapping['group']
+        dtype = mapping['dtype']
         if group not in by_group:
             by_group[group] = []
         by_group[group].append((field, mapping))
+        type_counts[dtype] += 1
+        group_counts[group] += 1
 
     # Print results by group
     for group in sorted(by_group.keys()):
@@ -718,20 +836,10 @@ if __name__ == '__main__':
     print(f"{'='*80}")
     print(f"Total fields analyzed: {len(results)}")
 
-    type_counts = {}
-    for mapping in results.values():
-        dtype = mapping['dtype']
-        type_counts[dtype] = type_counts.get(dtype, 0) + 1
-
     print("\nType distribution:")
     for dtype, count in sorted(type_counts.items()):
         print(f"  {dtype}: {count}")
 
-    group_counts = {}
-    for mapping in results.values():
-        group = mapping['group']
-        group_counts[group] = group_counts.get(group, 0) + 1
-
     print("\nGroup distribution:")
     for group, count in sorted(group_counts.items()):
         print(f"  {group}: {count}")
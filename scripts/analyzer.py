@@ -6,13 +6,46 @@ Excel字段分析引擎 - Claude Code Skill版本
 """
 
 import os
+import re
 import json
+import html
+import heapq
 import pandas as pd
 import numpy as np
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Any, Optional
 from collections import Counter
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, TextIO, Union
+
+import csv_reader  # CSV读取（与手机号填充工具共用）
+
+# 可选：orjson（C实现的JSON解析/序列化），输出与json.dump(ensure_ascii=False, indent=2)一致
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# 可选：Polars 多线程 CSV 读取
+try:
+    import polars as pl
+    POLARS_AVAILABLE = True
+except ImportError:
+    POLARS_AVAILABLE = False
+
+# 日期格式推断（pandas>=2.0）
+try:
+    from pandas.tseries.api import guess_datetime_format
+except ImportError:
+    guess_datetime_format = None
+
+# 可选：Aho-Corasick 自动机，用于短语匹配
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
 
 # 导入AI映射器
 try:
@@ -38,23 +71,44 @@ class FieldMappingManager:
         self.skill_dir = skill_dir
         self.mappings_dir = skill_dir / 'field_mappings'
         self.combined_mappings = {}
+        self.ai_mapper = None
         self.load_all_mappings()
 
+    def read_json(self, path: Path) -> Any:
+        """读取JSON文件（orjson不接受NaN等json模块允许的写法，解析失败时交给json模块）"""
+        if ORJSON_AVAILABLE:
+            try:
+                return orjson.loads(path.read_bytes())
+            except orjson.JSONDecodeError:
+                pass
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def write_json(self, path: Path, data: Any):
+        """写入JSON文件（UTF-8，缩进2空格）"""
+        if ORJSON_AVAILABLE:
+            path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+            return
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, ensure_ascii=False, indent=2, fp=f)
+
     def load_all_mappings(self):
         """加载所有映射配置文件"""
         if not self.mappings_dir.exists():
             return
 
+        all_mappings = []
         for json_file in self.mappings_dir.glob('*.json'):
             try:
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    mappings = config.get('mappings', {})
-                    # 合并到总映射表（后加载的会覆盖先加载的）
-                    self.combined_mappings.update(mappings)
+                all_mappings.append(self.read_json(json_file).get('mappings', {}))
             except Exception as e:
                 print(f"⚠️ 加载映射文件失败 {json_file.name}: {e}")
 
+        # 一次性合并到总映射表（后加载的会覆盖先加载的）
+        self.combined_mappings.update(
+            {cn_field: mapping for mappings in all_mappings for cn_field, mapping in mappings.items()}
+        )
+
     def get_mapping(self, cn_field: str) -> Optional[Dict]:
         """获取字段映射"""
         return self.combined_mappings.get(cn_field)
@@ -65,8 +119,7 @@ class FieldMappingManager:
 
         # 读取现有配置
         if custom_file.exists():
-            with open(custom_file, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            config = self.read_json(custom_file)
         else:
             config = {
                 "domain": "custom",
@@ -92,8 +145,7 @@ class FieldMappingManager:
         })
 
         # 保存
-        with open(custom_file, 'w', encoding='utf-8') as f:
-            json.dump(config, ensure_ascii=False, indent=2, fp=f)
+        self.write_json(custom_file, config)
 
         # 更新内存中的映射
         self.combined_mappings[cn_field] = config['mappings'][cn_field]
@@ -120,8 +172,10 @@ class FieldMappingManager:
             print("❌ AI映射器不可用，无法进行批量学习")
             return {}
 
-        ai_mapper = AIFieldMapper()
-        mappings = ai_mapper.batch_analyze_fields(unknown_fields, df)
+        # 复用同一个映射器，跨文件重复出现的字段名直接命中其缓存
+        if self.ai_mapper is None:
+            self.ai_mapper = AIFieldMapper()
+        mappings = self.ai_mapper.batch_analyze_fields(unknown_fields, df)
 
         # 批量保存到custom.json
         for cn_field, mapping in mappings.items():
@@ -139,71 +193,263 @@ class FieldMappingManager:
 class ExcelAnalyzer:
     """Excel字段分析器 - 增强版"""
 
+    # 列名关键词分类规则（预编译，按优先级顺序匹配）
+    TIME_PATTERN = re.compile(r'时间|日期')
+    NUMERIC_PATTERN = re.compile(r'金额|保费|NCD|费用|赔款|赔付|案件数|频度|系数|评分|\(万\)|（万）|率')
+    GROUP_PATTERNS = [
+        ('time', TIME_PATTERN),
+        ('organization', re.compile(r'机构')),
+        ('finance', re.compile(r'保费|费用|NCD')),
+        ('product', re.compile(r'险')),
+        ('flag', re.compile(r'是否')),
+        ('partner', re.compile(r'4S|集团')),
+        ('vehicle', re.compile(r'车')),
+    ]
+
+    # role/aggregation 规则
+    DIMENSION_PATTERN = re.compile(r'评分|等级|分数|级别|系数')
+    AVG_AGGREGATION_PATTERN = re.compile(r'比例|折扣|系数|NCD|优待')
+    SUM_AGGREGATION_PATTERN = re.compile(r'保费|金额|费用|价格|赔款|手续费|税')
+
+    # 文本列达到该数量时，Top值改为合并统计
+    BATCH_TOP_VALUES_MIN_COLS = 10
+
+    # 大表试转换时的随机样本行数（与判断大表的行数阈值无关）
+    PROBE_ROWS = 20_000
+
     def __init__(self, skill_dir: Optional[Path] = None):
         if skill_dir is None:
             # Scripts are now in scripts/ subdirectory, so parent.parent is the skill root
             skill_dir = Path(__file__).parent.parent
 
         self.mapping_manager = FieldMappingManager(skill_dir)
+        self.use_polars = POLARS_AVAILABLE
+        # Excel解析引擎，默认使用pandas默认引擎（openpyxl）；
+        # 'calamine'解析更快，但会把只含空白的单元格读成空值，空值/唯一值统计与openpyxl不同
+        self.excel_engine = None
+        self.validator = None  # 映射质量检查器，首次检查时创建
         self.phrase_to_token = self.mapping_manager.get_phrase_to_token_dict()
 
+        # 短语按长度降序排列一次（贪婪最长匹配），并建立自动机一次性扫描列名
+        self.sorted_phrases = sorted(self.phrase_to_token.items(), key=lambda kv: len(kv[0]), reverse=True)
+        self.phrase_rank = {ph: i for i, (ph, _) in enumerate(self.sorted_phrases)}
+        self.phrase_automaton = self.build_phrase_automaton()
+
+        # 短语匹配只依赖初始化时的短语表，按列名缓存结果（同名列跨工作表时直接命中）
+        self.match_phrases = lru_cache(maxsize=4096)(self.match_phrases)
+
+    def build_phrase_automaton(self):
+        """构建短语Aho-Corasick自动机（ahocorasick不可用或短语表为空时返回None）"""
+        if not AHOCORASICK_AVAILABLE or not self.sorted_phrases:
+            return None
+
+        automaton = ahocorasick.Automaton()
+        for ph, _ in self.sorted_phrases:
+            automaton.add_word(ph, ph)
+        automaton.make_automaton()
+        return automaton
+
     def is_csv_file(self, file_path: Path) -> bool:
         """检测是否为CSV文件"""
         return file_path.suffix.lower() in ['.csv', '.txt']
 
-    def load_sheet(self, file_path: Path, sheet_name: str = None) -> pd.DataFrame:
-        """读取指定工作表或CSV文件"""
-        if self.is_csv_file(file_path):
+    def read_csv(self, file_path: Path) -> pd.DataFrame:
+        """读取CSV文件，所有列均按字符串读取（优先使用Polars/PyArrow多线程解析）"""
+        if self.use_polars:
+            try:
+                columns = csv_reader.read_csv_header(file_path)
+                if columns is not None:
+                    # infer_schema_length=0：所有列按字符串读取，在边界处转换为pandas
+                    frame = pl.read_csv(file_path, infer_schema_length=0, null_values=csv_reader.CSV_NULL_VALUES)
+                    # pandas跳过空行（含只有空白的行），Polars把它们读成首列为空白、其余为空的行；
+                    # 出现这种行时无法区分，交给其他引擎
+                    first = pl.col(frame.columns[0])
+                    blank_row = pl.all_horizontal([pl.col(c).is_null() for c in frame.columns[1:]]) & (
+                        first.is_null() | (first.str.strip_chars() == ''))
+                    if frame.width == len(columns) and not frame.select(blank_row.any()).item():
+                        # 列名改用pandas的表头（Unnamed/重名改写与pandas一致）
+                        frame.columns = columns
+                        return frame.to_pandas()
+            except Exception:
+                # 编码、列数不齐等Polars无法处理时，继续尝试其他引擎
+                pass
+
+        return csv_reader.read_csv(file_path)
+
+    def to_datetime_column(self, s: pd.Series) -> pd.Series:
+        """
+        转换为时间列（无法解析的值记为NaT）
+
+        先用前1000个非空值推断统一格式，全部能解析时按该格式走C快速路径；
+        格式不统一时使用format='mixed'逐个解析
+        """
+        if np.issubdtype(s.dtype, np.datetime64):
+            return s
+
+        sample = s.dropna().head(1000)
+        fmt = guess_datetime_format(str(sample.iloc[0])) if guess_datetime_format and len(sample) else None
+        if fmt and pd.to_datetime(sample, format=fmt, errors='coerce').notna().all():
+            return pd.to_datetime(s, format=fmt, errors='coerce')
+        return pd.to_datetime(s, format='mixed', errors='coerce')
+
+    def to_numeric_column(self, s: pd.Series) -> pd.Series:
+        """转换为数值列（去除千分位逗号，无法解析的值记为NaN）"""
+        return pd.to_numeric(s.str.replace(',', '', regex=False), errors='coerce')
+
+    def sample_converts(self, s: pd.Series, convert, probe_rows: int, threshold: float = 0.95) -> bool:
+        """在随机样本上试转换，判断整列转换是否有意义（样本中至少threshold比例可解析）"""
+        # 只按位置抽取非空值，不复制整列
+        valid_pos = np.flatnonzero(s.notna().to_numpy())
+        if not len(valid_pos):
+            return True
+        if len(valid_pos) > probe_rows:
+            valid_pos = np.random.default_rng(0).choice(valid_pos, probe_rows, replace=False)
+        return convert(s.iloc[valid_pos]).notna().mean() >= threshold
+
+    def load_sheet(
+        self,
+        file_path: Union[Path, pd.ExcelFile],
+        sheet_name: str = None,
+        sample_rows: int = 1_000_000
+    ) -> pd.DataFrame:
+        """
+        读取指定工作表或CSV文件
+
+        file_path也可以是已打开的pd.ExcelFile，多个工作表共用同一次工作簿解析；
+        行数超过sample_rows时，先在PROBE_ROWS行的随机样本上判断时间/数值列能否解析，
+        大部分无法解析的列保留为字符串，避免无意义的整列转换
+        """
+        if isinstance(file_path, pd.ExcelFile):
+            # 已打开的Excel工作簿
+            df = file_path.parse(sheet_name, dtype=str)
+        elif self.is_csv_file(file_path):
             # CSV文件
-            df = pd.read_csv(file_path, dtype=str, encoding='utf-8-sig')
+            df = self.read_csv(file_path)
         else:
             # Excel文件
-            df = pd.read_excel(file_path, sheet_name=sheet_name, dtype=str)
+            df = pd.read_excel(file_path, sheet_name=sheet_name, dtype=str, engine=self.excel_engine)
 
-        df = df.map(lambda x: str(x).strip() if pd.notna(x) else x)
+        # 向量化去除首尾空白（.str.strip() 原生保留 NaN）
+        for c in df.columns:
+            df[c] = df[c].str.strip()
+
+        large = len(df) > sample_rows
 
         # 识别时间列
-        time_cols = [c for c in df.columns if ('时间' in str(c)) or ('日期' in str(c))]
+        time_cols = [c for c in df.columns if self.TIME_PATTERN.search(str(c))]
         for c in time_cols:
-            df[c] = pd.to_datetime(df[c], errors='coerce')
+            if large and not self.sample_converts(df[c], self.to_datetime_column, self.PROBE_ROWS):
+                continue
+            df[c] = self.to_datetime_column(df[c])
 
         # 识别数值列
-        num_like = [c for c in df.columns if any(k in str(c) for k in [
-            '金额', '保费', 'NCD', '费用', '总费用', '赔款', '赔付',
-            '案件数', '频度', '系数', '评分', '(万)', '（万）', '率'
-        ])]
+        num_like = [c for c in df.columns if self.NUMERIC_PATTERN.search(str(c))]
+        if large:
+            num_like = [c for c in num_like if self.sample_converts(df[c], self.to_numeric_column, self.PROBE_ROWS)]
         for c in num_like:
-            s = df[c].str.replace(',', '', regex=False)
-            df[c] = pd.to_numeric(s, errors='coerce')
+            df[c] = self.to_numeric_column(df[c])
+
+        # 其余全空的列转为float64，与逐元素map去空白时推断出的类型一致（生成的映射为number/measure）
+        if len(df):
+            for c in df.columns:
+                if df[c].dtype == object and not df[c].notna().any():
+                    df[c] = df[c].astype('float64')
 
         return df
 
+    def top_values(self, values: pd.Series, topn: int, label=str) -> List[tuple]:
+        """
+        统计出现频次最高的前topn个值
+        同频次按首次出现顺序排列（与Counter.most_common一致），只对保留下来的值用label做字符串化
+        """
+        counts = values.value_counts(dropna=False, sort=False)
+        counts = counts.sort_values(ascending=False, kind='stable').head(topn)
+        return [(label(v), int(cnt)) for v, cnt in counts.items()]
+
+    def batched_top_values(self, df: pd.DataFrame, cols: List[Any], topn: int) -> Dict[Any, List[tuple]]:
+        """
+        多个文本列一次性统计Top值（转为长表后单次groupby），结果与逐列top_values一致
+        """
+        # 用列序号代替列名，避免与长表的列名冲突
+        long = df[cols].set_axis(range(len(cols)), axis=1).melt(var_name='col', value_name='val')
+        counts = long.dropna(subset=['val']).groupby(['col', 'val'], sort=False).size()
+        counts = counts.sort_values(ascending=False, kind='stable')
+        top = counts.groupby(level='col', sort=False).head(topn)
+
+        result: Dict[Any, List[tuple]] = {c: [] for c in cols}
+        for (i, v), cnt in top.items():
+            result[cols[i]].append((str(v), int(cnt)))
+        return result
+
+    def date_label(self, value) -> str:
+        """日期值转为YYYY-MM-DD（NaT保持为'NaT'）"""
+        return 'NaT' if pd.isna(value) else value.strftime('%Y-%m-%d')
+
+    def column_stats(self, df: pd.DataFrame) -> tuple[Dict[Any, int], Dict[Any, int], Dict[Any, Dict[str, float]]]:
+        """
+        整表一次性计算空值数、唯一值数和数值统计
+        返回: (空值数, 唯一值数, 数值列的min/max/mean/sum)
+        """
+        num_cols = list(df.select_dtypes(include='number').columns)
+
+        na_counts = df.isna().sum().to_dict()
+        nuniques = df.nunique(dropna=True).to_dict()
+        num_stats = df[num_cols].agg(['min', 'max', 'mean', 'sum']).to_dict() if num_cols else {}
+        return na_counts, nuniques, num_stats
+
     def summarize_columns(self, df: pd.DataFrame, topn: int = 10) -> Dict[str, Dict[str, Any]]:
         """生成列级摘要"""
         summary: Dict[str, Dict[str, Any]] = {}
+
+        # 整表一次性计算空值数、唯一值数和数值统计，避免逐列多次扫描
+        na_counts, nuniques, num_stats = self.column_stats(df)
+
+        # 需要计数的文本列较多时，合并为一次groupby统计
+        text_cols = [
+            c for c in df.columns
+            if not np.issubdtype(df[c].dtype, np.datetime64) and not np.issubdtype(df[c].dtype, np.number)
+            and na_counts[c] < len(df) and nuniques[c] > 1
+        ]
+        batched = self.batched_top_values(df, text_cols, topn) if len(text_cols) >= self.BATCH_TOP_VALUES_MIN_COLS else {}
+
         for c in df.columns:
             col = df[c]
             n = len(col)
-            na = int(col.isna().sum())
+            na = int(na_counts[c])
             non_na = n - na
-            uniq = int(col.nunique(dropna=True))
+            uniq = int(nuniques[c])
             freq: Any = None
             numeric_stats: Optional[Dict[str, float]] = None
 
+            # 全空列或无空值的常量列，Top值可直接得出，无需计数
+            constant = uniq == 1 and na == 0
+
             if np.issubdtype(col.dtype, np.datetime64):
-                freq = Counter(col.dt.date.astype('str')).most_common(topn)
+                if non_na == 0:
+                    freq = [('NaT', n)][:topn] if n else []
+                elif constant:
+                    freq = [(self.date_label(col.iloc[0]), n)][:topn]
+                else:
+                    # 在datetime64上按天归一后计数，不为每行创建date对象
+                    freq = self.top_values(col.dt.normalize(), topn, label=self.date_label)
             elif np.issubdtype(col.dtype, np.number):
-                valid = col.dropna()
-                if len(valid):
-                    numeric_stats = {
-                        'min': float(valid.min()),
-                        'max': float(valid.max()),
-                        'mean': float(valid.mean()),
-                        'sum': float(valid.sum()),
-                    }
-                freq = Counter(valid.astype('float').round(2).astype('str')).most_common(topn) if len(valid) else []
+                if non_na and c in num_stats:
+                    numeric_stats = {k: float(v) for k, v in num_stats[c].items()}
+                if non_na == 0:
+                    freq = []
+                elif uniq == 1 and numeric_stats:
+                    freq = [(str(np.round(np.float64(numeric_stats['min']), 2)), non_na)][:topn]
+                else:
+                    freq = self.top_values(col.dropna().astype('float').round(2), topn)
             else:
-                freq = Counter(col.dropna().astype('str')).most_common(topn)
+                if non_na == 0:
+                    freq = []
+                elif uniq == 1:
+                    freq = [(str(col.iloc[int(col.notna().argmax())]), non_na)][:topn]
+                elif c in batched:
+                    freq = batched[c]
+                else:
+                    freq = self.top_values(col.dropna(), topn)
 
             summary[c] = {
                 'rows': n,
@@ -217,34 +463,27 @@ class ExcelAnalyzer:
             }
         return summary
 
-    def derive_group(self, col: str) -> str:
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def derive_group(col: str) -> str:
         """根据列名关键词归类"""
         name = str(col)
-        if ('时间' in name) or ('日期' in name):
-            return 'time'
-        if '机构' in name:
-            return 'organization'
-        if ('保费' in name) or ('费用' in name) or ('NCD' in name):
-            return 'finance'
-        if ('险' in name):
-            return 'product'
-        if ('是否' in name):
-            return 'flag'
-        if ('4S' in name) or ('集团' in name):
-            return 'partner'
-        if ('车牌' in name):
-            return 'vehicle'
-        if ('车' in name):
-            return 'vehicle'
+        for group, pattern in ExcelAnalyzer.GROUP_PATTERNS:
+            if pattern.search(name):
+                return group
         return 'general'
 
-    def dtype_to_role(self, dtype_str: str) -> str:
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def dtype_to_role(dtype_str: str) -> str:
         """dtype映射为role"""
         if dtype_str.startswith('float') or dtype_str.startswith('int'):
             return 'measure'
         return 'dimension'
 
-    def dtype_to_kind(self, dtype_str: str) -> str:
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def dtype_to_kind(dtype_str: str) -> str:
         """dtype映射为kind"""
         if dtype_str.startswith('float') or dtype_str.startswith('int'):
             return 'number'
@@ -268,121 +507,161 @@ class ExcelAnalyzer:
         if mapping:
             return mapping['en_name'], True
 
-        # 短语匹配（贪婪最长）
-        phrases = sorted(self.phrase_to_token.items(), key=lambda kv: len(kv[0]), reverse=True)
+        return self.match_phrases(text)
+
+    def match_phrases(self, text: str) -> tuple[str, bool]:
+        """
+        短语匹配（贪婪最长）
+        返回: (英文名, 是否匹配到短语)
+        """
         tokens: list[str] = []
-        for ph, tk in phrases:
-            if ph in text and tk not in tokens:
-                tokens.append(tk)
-                text = text.replace(ph, '')
+        if self.phrase_automaton is None:
+            for ph, tk in self.sorted_phrases:
+                if ph in text and tk not in tokens:
+                    tokens.append(tk)
+                    text = text.replace(ph, '')
+        else:
+            # 与按长度降序逐个检查的顺序一致，但只检查自动机在列名中找到的短语（按排名出堆）；
+            # 删除短语后前后文字会拼接成新的短语，重新扫描并补入排名在当前短语之后的候选
+            pending = sorted({self.phrase_rank[ph] for _, ph in self.phrase_automaton.iter(text)})
+            seen = set(pending)
+            while pending:
+                rank = heapq.heappop(pending)
+                ph, tk = self.sorted_phrases[rank]
+                if ph in text and tk not in tokens:
+                    tokens.append(tk)
+                    text = text.replace(ph, '')
+                    for _, found in self.phrase_automaton.iter(text):
+                        found_rank = self.phrase_rank[found]
+                        if found_rank > rank and found_rank not in seen:
+                            seen.add(found_rank)
+                            heapq.heappush(pending, found_rank)
 
         if tokens:
             return '_'.join(tokens), True
 
         return 'unknown_field', False
 
-    def build_field_mapping(self, sheet_summary: Dict[str, Dict[str, Any]]) -> tuple[List[Dict[str, Any]], List[str]]:
+    def build_field_entry(self, col: Any, s: Dict[str, Any]) -> tuple[Dict[str, Any], bool]:
         """
-        生成字段映射列表
-        返回: (映射列表, 未知字段列表)
+        生成单个字段的映射（field_name尚未去重）
+        返回: (映射, 是否为未知字段)
         """
-        mapping: List[Dict[str, Any]] = []
-        used_names: Dict[str, int] = {}
-        unknown_fields: List[str] = []
-
-        for idx, (col, s) in enumerate(sheet_summary.items()):
-            dtype_str = str(s['dtype'])
-
-            # 优先使用映射库中的信息（包括英文名）
-            field_mapping = self.mapping_manager.get_mapping(str(col))
-            if field_mapping:
-                # ✅ 使用映射库中的英文名、group、dtype和description
-                field_en = field_mapping['en_name']
-                group = field_mapping.get('group', self.derive_group(col))
-                kind = field_mapping.get('dtype', self.dtype_to_kind(dtype_str))
-                desc = field_mapping.get('description', str(col))
-                found = True
+        col_name = str(col)
+        dtype_str = str(s['dtype'])
+        unknown = False
+
+        # 优先使用映射库中的信息（包括英文名）
+        field_mapping = self.mapping_manager.get_mapping(col_name)
+        if field_mapping:
+            # ✅ 使用映射库中的英文名、group、dtype和description（缺失时才推断）
+            field_en = field_mapping['en_name']
+            group = field_mapping['group'] if 'group' in field_mapping else self.derive_group(col_name)
+            kind = field_mapping['dtype'] if 'dtype' in field_mapping else self.dtype_to_kind(dtype_str)
+            desc = field_mapping.get('description', col_name)
+            found = True
+        else:
+            # 如果映射库中没有，才使用自动生成
+            field_en, found = self.generate_alias_from_cn(col_name)
+            unknown = not found
+
+            # 使用自动推断
+            group = self.derive_group(col_name)
+            kind = self.dtype_to_kind(dtype_str)
+            # 生成描述
+            if kind == 'number':
+                desc = f"数值字段（{col}），可用于按时间/机构等维度进行汇总分析。"
+            elif kind == 'datetime':
+                desc = f"时间字段（{col}），可用于时间序列统计与趋势分析。"
             else:
-                # 如果映射库中没有，才使用自动生成
-                field_en, found = self.generate_alias_from_cn(str(col))
-                if not found:
-                    unknown_fields.append(str(col))
-
-                # 使用自动推断
-                group = self.derive_group(col)
-                kind = self.dtype_to_kind(dtype_str)
-                # 生成描述
-                if kind == 'number':
-                    desc = f"数值字段（{col}），可用于按时间/机构等维度进行汇总分析。"
-                elif kind == 'datetime':
-                    desc = f"时间字段（{col}），可用于时间序列统计与趋势分析。"
-                else:
-                    desc = f"分类/文本字段（{col}），可用于分组与维度统计。"
-
-            role = self.dtype_to_role(dtype_str)
-
-            # 🆕 专业role/aggregation规则（覆盖默认行为）
-            col_name = str(col)
-
-            # 1. 评分/等级/分数/级别 字段应为维度（dimension），而非度量
-            if any(keyword in col_name for keyword in ['评分', '等级', '分数', '级别']):
-                role = 'dimension'
-
-            # 2. 系数字段也应为维度或使用平均值聚合
-            if '系数' in col_name:
-                role = 'dimension'
+                desc = f"分类/文本字段（{col}），可用于分组与维度统计。"
+
+        role = self.dtype_to_role(dtype_str)
+
+        # 🆕 专业role/aggregation规则（覆盖默认行为）
+        # 1. 评分/等级/分数/级别 字段应为维度（dimension），而非度量
+        # 2. 系数字段也应为维度或使用平均值聚合
+        if self.DIMENSION_PATTERN.search(col_name):
+            role = 'dimension'
+
+        # 3. 比例/折扣/系数字段如果是度量，应使用平均值聚合（不应求和）
+        aggregation = self.default_aggregation(role)
+        if role == 'measure':
+            if self.AVG_AGGREGATION_PATTERN.search(col_name):
+                aggregation = 'avg'
+            # 保费/金额/费用等确保使用sum（这是默认值，但显式确认）
+            elif self.SUM_AGGREGATION_PATTERN.search(col_name):
+                aggregation = 'sum'
+
+        notes = []
+        null_pct = s.get('null_pct', 0.0)
+        if null_pct > 0:
+            notes.append(f"空值率约 {null_pct}%")
+        if kind == 'number' and s.get('numeric_stats'):
+            ns = s['numeric_stats']
+            if ns['min'] < 0:
+                notes.append("存在负数，可能为冲销/退款/批改")
+
+        entry = {
+            'field_name': field_en,
+            'cn_name': col_name,
+            'source_column': col_name,
+            'group': group,
+            'dtype': kind,
+            'role': role,
+            'aggregation': aggregation,
+            'description': desc,
+            'notes': '；'.join(notes) if notes else '',
+            'is_mapped': found
+        }
+        return entry, unknown
 
-            # 3. 比例/折扣/系数字段如果是度量，应使用平均值聚合（不应求和）
-            aggregation = self.default_aggregation(role)
-            if role == 'measure':
-                if any(keyword in col_name for keyword in ['比例', '折扣', '系数', 'NCD', '优待']):
-                    aggregation = 'avg'
-                # 保费/金额/费用等确保使用sum（这是默认值，但显式确认）
-                elif any(keyword in col_name for keyword in ['保费', '金额', '费用', '价格', '赔款', '手续费', '税']):
-                    aggregation = 'sum'
+    def assign_unique_names(self, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """确保英文名唯一（重复的依次加 _1、_2 后缀），返回新的映射列表"""
+        mapping: List[Dict[str, Any]] = []
+        used_names: Dict[str, int] = {}
 
-            # 确保英文名唯一
+        for entry in entries:
+            field_en = entry['field_name']
             if field_en in used_names:
                 used_names[field_en] += 1
                 field_en = f"{field_en}_{used_names[field_en]}"
             else:
                 used_names[field_en] = 0
+            mapping.append({**entry, 'field_name': field_en})
 
-            notes = []
-            null_pct = s.get('null_pct', 0.0)
-            if null_pct > 0:
-                notes.append(f"空值率约 {null_pct}%")
-            if kind == 'number' and s.get('numeric_stats'):
-                ns = s['numeric_stats']
-                if ns['min'] < 0:
-                    notes.append("存在负数，可能为冲销/退款/批改")
-
-            mapping.append({
-                'field_name': field_en,
-                'cn_name': str(col),
-                'source_column': str(col),
-                'group': group,
-                'dtype': kind,
-                'role': role,
-                'aggregation': aggregation,
-                'description': desc,
-                'notes': '；'.join(notes) if notes else '',
-                'is_mapped': found
-            })
-
-        return mapping, unknown_fields
+        return mapping
+
+    def build_field_entries(self, sheet_summary: Dict[str, Dict[str, Any]]) -> tuple[List[Dict[str, Any]], List[str]]:
+        """
+        逐列生成字段映射（field_name尚未去重）
+        返回: (映射列表, 未知字段列表)
+        """
+        entries: List[Dict[str, Any]] = []
+        unknown_fields: List[str] = []
+
+        for col, s in sheet_summary.items():
+            entry, unknown = self.build_field_entry(col, s)
+            entries.append(entry)
+            if unknown:
+                unknown_fields.append(entry['cn_name'])
+
+        return entries, unknown_fields
+
+    def build_field_mapping(self, sheet_summary: Dict[str, Dict[str, Any]]) -> tuple[List[Dict[str, Any]], List[str]]:
+        """
+        生成字段映射列表
+        返回: (映射列表, 未知字段列表)
+        """
+        entries, unknown_fields = self.build_field_entries(sheet_summary)
+        return self.assign_unique_names(entries), unknown_fields
 
     def html_escape(self, text: str) -> str:
         """HTML 转义"""
-        return (
-            str(text)
-            .replace('&', '&amp;')
-            .replace('<', '&lt;')
-            .replace('>', '&gt;')
-        )
+        return html.escape(str(text), quote=False)
 
-    def build_html_report(self, xlsx_path: Path, sheets: list, summaries: Dict[str, Dict[str, Dict[str, Any]]], topn: int) -> str:
-        """生成HTML报告"""
+    def build_html_report(self, out: TextIO, xlsx_path: Path, sheets: list, summaries: Dict[str, Dict[str, Dict[str, Any]]], topn: int) -> None:
+        """生成HTML报告（逐段写入out，避免拼接整份报告字符串）"""
         file_type = "CSV" if self.is_csv_file(xlsx_path) else "Excel"
         title = f"{file_type} 字段分析报告"
         generated_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
@@ -409,12 +688,12 @@ class ExcelAnalyzer:
   <h1>{self.html_escape(title)}</h1>
   <div class="meta">数据文件：<span class="code">{self.html_escape(str(xlsx_path))}</span> | 生成时间：{self.html_escape(generated_at)} | 工作表数量：{len(sheets)}（{self.html_escape(', '.join(sheets))}） | Top 值展示：前 {topn} 项</div>
 """
-        parts = [head]
+        out.write(head)
 
         for sheet in sheets:
-            parts.append(f"<h2>工作表：{self.html_escape(sheet)}</h2>")
-            parts.append("<table>")
-            parts.append("<thead><tr>\n"
+            out.write(f"\n<h2>工作表：{self.html_escape(sheet)}</h2>")
+            out.write("\n<table>")
+            out.write("\n<thead><tr>\n"
                          "<th>列名</th>\n"
                          "<th>行数</th>\n"
                          "<th>非空</th>\n"
@@ -425,7 +704,7 @@ class ExcelAnalyzer:
                          "<th>数值统计</th>\n"
                          "<th>Top 值</th>\n"
                          "</tr></thead>")
-            parts.append("<tbody>")
+            out.write("\n<tbody>")
 
             summary = summaries[sheet]
             for col_name, s in summary.items():
@@ -435,8 +714,8 @@ class ExcelAnalyzer:
                     stats_str = f"min={stats['min']:.4f}; max={stats['max']:.4f}; mean={stats['mean']:.4f}; sum={stats['sum']:.4f}"
                 tv = s.get('top_values') or []
                 tv_str = ', '.join([f"{self.html_escape(v)}({cnt})" for v, cnt in tv])
-                parts.append(
-                    "<tr>" +
+                out.write(
+                    "\n<tr>" +
                     f"<td>{self.html_escape(col_name)}</td>" +
                     f"<td>{s['rows']}</td>" +
                     f"<td>{s['non_null']}</td>" +
@@ -448,11 +727,26 @@ class ExcelAnalyzer:
                     f"<td>{tv_str}</td>" +
                     "</tr>"
                 )
-            parts.append("</tbody>")
-            parts.append("</table>")
+            out.write("\n</tbody>")
+            out.write("\n</table>")
+
+        out.write("\n</body></html>")
+
+    def process_sheet(
+        self,
+        source: Union[Path, pd.ExcelFile],
+        sheet: Optional[str],
+        topn: int,
+        keep_frame: bool = False
+    ) -> tuple[int, int, Dict[str, Dict[str, Any]], Optional[pd.DataFrame]]:
+        """
+        读取并汇总单个工作表，返回 (行数, 列数, 列级摘要, DataFrame)
 
-        parts.append("</body></html>")
-        return '\n'.join(parts)
+        只有keep_frame为True时返回DataFrame（否则为None），其余工作表的数据汇总后即可释放
+        """
+        df = self.load_sheet(source, sheet)
+        summary = self.summarize_columns(df, topn=topn)
+        return len(df), len(df.columns), summary, df if keep_frame else None
 
     def analyze_excel(self, xlsx_path: str, output_dir: str, topn: int = 10) -> Dict[str, Any]:
         """分析Excel或CSV文件"""
@@ -464,32 +758,37 @@ class ExcelAnalyzer:
             print(f"📊 开始分析: {xlsx_path.name}")
 
             # 检测文件类型
+            xls = None
             if self.is_csv_file(xlsx_path):
-                # CSV文件，视为单个工作表
+                # CSV文件，视为单个工作表（读取时忽略工作表名）
                 sheets = [xlsx_path.stem]  # 使用文件名作为工作表名
+                source = xlsx_path
                 print(f"📄 文件类型: CSV")
             else:
                 # Excel文件，加载工作簿
-                xls = pd.ExcelFile(xlsx_path)
+                xls = pd.ExcelFile(xlsx_path, engine=self.excel_engine)
                 sheets = xls.sheet_names
+                source = xls
                 print(f"📄 工作表: {', '.join(sheets)}")
 
             summaries: Dict[str, Dict[str, Dict[str, Any]]] = {}
+            dfs: Dict[str, pd.DataFrame] = {}
             total_rows = 0
             total_cols = 0
 
             for sheet in sheets:
-                if self.is_csv_file(xlsx_path):
-                    # CSV文件不需要sheet_name参数
-                    df = self.load_sheet(xlsx_path)
-                else:
-                    # Excel文件需要sheet_name参数
-                    df = self.load_sheet(xlsx_path, sheet)
-
-                summary = self.summarize_columns(df, topn=topn)
+                # 只有第一个工作表会用于字段映射和AI学习，其余工作表只保留行列数和摘要
+                n_rows, n_cols, summary, df = self.process_sheet(
+                    source, sheet, topn, keep_frame=(sheet == sheets[0])
+                )
                 summaries[sheet] = summary
-                total_rows += len(df)
-                total_cols += len(df.columns)
+                if df is not None:
+                    dfs[sheet] = df
+                total_rows += n_rows
+                total_cols += n_cols
+
+            if xls is not None:
+                xls.close()
 
             # 生成输出文件名
             base = xlsx_path.stem
@@ -502,24 +801,21 @@ class ExcelAnalyzer:
             json_path = output_dir / json_filename
 
             # 生成HTML报告
-            html = self.build_html_report(xlsx_path, sheets, summaries, topn)
-            html_path.write_text(html, encoding='utf-8')
+            with open(html_path, 'w', encoding='utf-8') as f:
+                self.build_html_report(f, xlsx_path, sheets, summaries, topn)
             print(f"✅ HTML报告: {html_path}")
 
             # 生成字段映射
             first_sheet = sheets[0]
-            field_map, unknown_fields = self.build_field_mapping(summaries[first_sheet])
+            entries, unknown_fields = self.build_field_entries(summaries[first_sheet])
 
             # 🤖 AI批量学习未知字段
             if unknown_fields and AI_MAPPER_AVAILABLE:
                 print(f"\n🔍 发现 {len(unknown_fields)} 个未知字段")
                 print("💡 使用AI自动生成字段映射...")
 
-                # 获取DataFrame用于样本分析
-                if self.is_csv_file(xlsx_path):
-                    df_for_learning = self.load_sheet(xlsx_path)
-                else:
-                    df_for_learning = self.load_sheet(xlsx_path, first_sheet)
+                # 复用第一遍读取的DataFrame用于样本分析，避免重复解析文件
+                df_for_learning = dfs[first_sheet]
 
                 # AI批量学习
                 learned_mappings = self.mapping_manager.batch_learn_fields(unknown_fields, df_for_learning)
@@ -527,8 +823,16 @@ class ExcelAnalyzer:
                 if learned_mappings:
                     print(f"✅ 已生成 {len(learned_mappings)} 个字段映射并保存到 custom.json")
 
-                    # 重新生成字段映射（包含新学习的字段）
-                    field_map, unknown_fields = self.build_field_mapping(summaries[first_sheet])
+                    # 只重新生成新学习字段的映射，其余字段保持不变
+                    for i, (col, col_summary) in enumerate(summaries[first_sheet].items()):
+                        if entries[i]['cn_name'] in learned_mappings:
+                            entries[i], _ = self.build_field_entry(col, col_summary)
+                    unknown_fields = [f for f in unknown_fields if f not in learned_mappings]
+
+            field_map = self.assign_unique_names(entries)
+
+            # 样本分析完成后释放DataFrame
+            del dfs
 
             json_path.write_text(json.dumps(field_map, ensure_ascii=False, indent=2), encoding='utf-8')
             print(f"✅ 字段映射: {json_path}")
@@ -537,7 +841,10 @@ class ExcelAnalyzer:
             quality_report_path = None
             if VALIDATOR_AVAILABLE and field_map:
                 print(f"\n🔍 进行映射质量检查...")
-                validator = MappingValidator()
+                # 复用同一个检查器，多次分析时重复的映射直接命中其缓存
+                if self.validator is None:
+                    self.validator = MappingValidator()
+                validator = self.validator
                 validation_result = validator.batch_validate(field_map)
 
                 # 生成质量报告
@@ -554,20 +861,15 @@ class ExcelAnalyzer:
                 print(f"   报告: {quality_report_path}")
 
             # 统计信息
+            # 按首次出现顺序计数，转回普通dict便于序列化
             field_stats = {
                 'total_fields': len(field_map),
-                'by_dtype': {},
-                'by_group': {},
+                'by_dtype': dict(Counter(field['dtype'] for field in field_map)),
+                'by_group': dict(Counter(field['group'] for field in field_map)),
                 'unknown_count': len(unknown_fields),
                 'mapped_count': len(field_map) - len(unknown_fields)
             }
 
-            for field in field_map:
-                dtype = field['dtype']
-                group = field['group']
-                field_stats['by_dtype'][dtype] = field_stats['by_dtype'].get(dtype, 0) + 1
-                field_stats['by_group'][group] = field_stats['by_group'].get(group, 0) + 1
-
             result = {
                 'success': True,
                 'message': f'成功分析 {len(sheets)} 个工作表',
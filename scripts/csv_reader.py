@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CSV读取工具 - 分析引擎与手机号填充工具共用
+所有列按字符串读取，结果与 pd.read_csv(dtype=str, encoding='utf-8-sig') 逐格一致，
+PyArrow可用时优先使用其多线程解析
+"""
+
+import pandas as pd
+from pathlib import Path
+from typing import List, Optional
+
+# 可选：PyArrow 多线程 CSV 读取
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# 与pandas read_csv默认一致的空值标记（供PyArrow/Polars读取时使用）
+CSV_NULL_VALUES = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND',
+    '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+]
+
+
+def read_csv_header(file_path: Path) -> Optional[List[str]]:
+    """
+    读取pandas解析的表头（含Unnamed/重名改写），供多线程引擎沿用
+
+    单列文件、表头前有空行或表头跨行时返回None，由pandas直接读取
+    """
+    columns = [str(c) for c in pd.read_csv(file_path, nrows=0, encoding='utf-8-sig').columns]
+    with open(file_path, 'rb') as f:
+        first_line = f.readline(1 << 16)
+    header_on_first_line = bool(first_line.removeprefix(b'\xef\xbb\xbf')[:1].strip())
+    if len(columns) > 1 and header_on_first_line and not any('\n' in c or '\r' in c for c in columns):
+        return columns
+    return None
+
+
+def read_csv_pyarrow(file_path: Path, columns: List[str]) -> pd.DataFrame:
+    """按read_csv_header得到的表头用PyArrow读取，所有列显式声明为string，避免类型推断丢失前导零"""
+    table = pa_csv.read_csv(
+        file_path,
+        read_options=pa_csv.ReadOptions(block_size=8 << 20, column_names=columns, skip_rows=1),
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={c: pa.string() for c in columns},
+            strings_can_be_null=True,
+            null_values=CSV_NULL_VALUES,
+        ),
+    )
+    return table.to_pandas(self_destruct=True)
+
+
+def read_csv(file_path: Path) -> pd.DataFrame:
+    """读取CSV文件，所有列均按字符串读取（优先使用PyArrow，无法逐格一致时使用pandas）"""
+    if PYARROW_AVAILABLE:
+        try:
+            columns = read_csv_header(file_path)
+            if columns is not None:
+                return read_csv_pyarrow(file_path, columns)
+        except Exception:
+            # 列数不齐、编码等PyArrow无法处理时回退到pandas C引擎
+            pass
+
+    return pd.read_csv(file_path, dtype=str, encoding='utf-8-sig')
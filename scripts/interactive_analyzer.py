@@ -5,11 +5,45 @@
 支持未知字段的交互式学习
 """
 
+import re
 import sys
 from pathlib import Path
 from analyzer import ExcelAnalyzer
 
 
+# 简单的拼音映射（可以扩展）
+COMMON_WORDS = {
+    '客户': 'customer',
+    '等级': 'level',
+    '满意度': 'satisfaction',
+    '评分': 'score',
+    '代理': 'agent',
+    '代理商': 'agent',
+    '风险': 'risk',
+    '预警': 'warning',
+    '标识': 'flag',
+    '状态': 'status',
+    '类型': 'type',
+    '来源': 'source',
+    '渠道': 'channel',
+    '金额': 'amount',
+    '数量': 'count',
+    '比率': 'ratio',
+    '占比': 'percentage',
+    '名称': 'name',
+    '编号': 'code',
+    '地区': 'region',
+    '省份': 'province',
+    '城市': 'city',
+}
+
+# 按中文长度降序排列，建议英文名时优先匹配长词
+SORTED_COMMON_WORDS = sorted(COMMON_WORDS.items(), key=lambda x: len(x[0]), reverse=True)
+
+# 建议英文名时移除的特殊字符
+NON_WORD_PATTERN = re.compile(r'[^\w]')
+
+
 def analyze_with_learning(xlsx_path: str, output_dir: str = './analysis_output', topn: int = 10):
     """
     带交互式学习的分析流程
@@ -157,39 +191,11 @@ def analyze_with_learning(xlsx_path: str, output_dir: str = './analysis_output',
 
 def suggest_english_name(cn_field: str) -> str:
     """基于中文字段名建议英文名"""
-    import re
-
-    # 简单的拼音映射（可以扩展）
-    common_words = {
-        '客户': 'customer',
-        '等级': 'level',
-        '满意度': 'satisfaction',
-        '评分': 'score',
-        '代理': 'agent',
-        '代理商': 'agent',
-        '风险': 'risk',
-        '预警': 'warning',
-        '标识': 'flag',
-        '状态': 'status',
-        '类型': 'type',
-        '来源': 'source',
-        '渠道': 'channel',
-        '金额': 'amount',
-        '数量': 'count',
-        '比率': 'ratio',
-        '占比': 'percentage',
-        '名称': 'name',
-        '编号': 'code',
-        '地区': 'region',
-        '省份': 'province',
-        '城市': 'city',
-    }
-
     # 尝试匹配常见词
     tokens = []
     remaining = cn_field
 
-    for cn, en in sorted(common_words.items(), key=lambda x: len(x[0]), reverse=True):
+    for cn, en in SORTED_COMMON_WORDS:
         if cn in remaining:
             tokens.append(en)
             remaining = remaining.replace(cn, '')
@@ -199,7 +205,7 @@ def suggest_english_name(cn_field: str) -> str:
 
     # 否则返回简单的字段名
     # 移除特殊字符
-    clean = re.sub(r'[^\w]', '', cn_field)
+    clean = NON_WORD_PATTERN.sub('', cn_field)
     return f"field_{clean[:20]}"  # 限制长度
 
 
@@ -7,14 +7,57 @@
 
 import json
 import re
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional
 from pathlib import Path
 from collections import Counter
+from functools import lru_cache
+from itertools import islice
+
+# 可选：orjson（C实现的JSON解析）
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# 可选：Aho-Corasick自动机（一次扫描找出中文名中的全部关键词）
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
 
 
 class MappingValidator:
     """字段映射质量检查器"""
 
+    # 预编译的检查规则
+    CJK_PATTERN = re.compile(r'[\u4e00-\u9fff]')
+    FIELD_DIGIT_SUFFIX_PATTERN = re.compile(r'_field_\d+$')
+    DIGIT_SUFFIX_PATTERN = re.compile(r'_\d+$')
+    # 命名规范快速路径：一次匹配即可确认 check_naming_convention 的各项检查全部通过
+    VALID_NAME_PATTERN = re.compile(
+        r'(?!field(?:_|$)|unknown_field$)(?!.*(?:__|_field$|_field_\d+$|_$))[a-z][a-z0-9_]{0,49}'
+    )
+
+    # 类型/聚合检查用的中文关键词
+    ID_KEYWORDS = ('保单号', '批单号', '证件号', '单号')
+    DATETIME_KEYWORDS = ('时间', '日期', '起期', '止期', '生效', '到期')
+    MONEY_KEYWORDS = ('保费', '费用', '金额', '价格', '赔款', '手续费', '税')
+    FORMAT_KEYWORDS = ('比例', '折扣', '系数')
+    FORMAT_SUFFIXES = ('_ratio', '_percent', '_coefficient', '_rate')
+    FORMAT_SUFFIX_PATTERN = re.compile('|'.join(map(re.escape, FORMAT_SUFFIXES)))
+    SCORE_KEYWORDS = ('评分', '等级', '分数', '级别', '系数')
+    AVG_KEYWORDS = ('比例', '系数', '折扣', '率')
+
+    # 各关键词组的首字集合：字段名与之无交集时整组跳过
+    ID_FIRST_CHARS = frozenset(kw[0] for kw in ID_KEYWORDS)
+    DATETIME_FIRST_CHARS = frozenset(kw[0] for kw in DATETIME_KEYWORDS)
+    MONEY_FIRST_CHARS = frozenset(kw[0] for kw in MONEY_KEYWORDS)
+    FORMAT_FIRST_CHARS = frozenset(kw[0] for kw in FORMAT_KEYWORDS)
+    SCORE_FIRST_CHARS = frozenset(kw[0] for kw in SCORE_KEYWORDS)
+    AVG_FIRST_CHARS = frozenset(kw[0] for kw in AVG_KEYWORDS)
+
     def __init__(self):
         # 英文命名规范
         self.naming_pattern = re.compile(r'^[a-z][a-z0-9_]*$')
@@ -36,6 +79,7 @@ class MappingValidator:
             # 客户相关
             'general': ['customer', 'client', 'name', 'id_number', 'age', 'gender', 'source', 'nature', 'applicant', 'insured', 'owner'],
         }
+        self.domain_terms = {group: frozenset(terms) for group, terms in self.domain_terms.items()}
 
         # 常见映射模式（中文关键词 -> 预期英文术语）
         self.expected_mappings = {
@@ -75,6 +119,21 @@ class MappingValidator:
             '排量': 'displacement',
         }
 
+        # 关键词自动机：值为(序号, 关键词, 预期英文)，按序号排序即为字典顺序
+        self.expected_automaton = None
+        if AHOCORASICK_AVAILABLE:
+            self.expected_automaton = ahocorasick.Automaton()
+            for i, (cn_keyword, expected_en) in enumerate(self.expected_mappings.items()):
+                self.expected_automaton.add_word(cn_keyword, (i, cn_keyword, expected_en))
+            self.expected_automaton.make_automaton()
+
+        # 建议英文名时按关键词长度降序匹配（稳定排序，同长度保持字典顺序）
+        self.sorted_expected = sorted(self.expected_mappings.items(),
+                                      key=lambda item: len(item[0]), reverse=True)
+
+        # 相同映射重复出现时（多个文件共用表头）复用检查结果
+        self._validate_fields = lru_cache(maxsize=4096)(self._validate_fields)
+
     def check_naming_convention(self, en_name: str) -> Tuple[bool, str]:
         """
         检查英文命名规范
@@ -82,6 +141,10 @@ class MappingValidator:
         Returns:
             (是否符合规范, 问题描述)
         """
+        # 绝大多数名称合规，整体匹配通过时直接返回；否则逐项检查给出具体原因
+        if self.VALID_NAME_PATTERN.fullmatch(en_name):
+            return True, ""
+
         if not en_name:
             return False, "英文字段名为空"
 
@@ -106,20 +169,24 @@ class MappingValidator:
             return False, f"❌ 严重：使用占位符后缀'_field'，应改为明确的业务术语（如{en_name.replace('_field', '')}）"
 
         # ⚠️ 严格禁止：数字后缀（表示重复定义）
-        if re.search(r'_field_\d+$', en_name):
+        if self.FIELD_DIGIT_SUFFIX_PATTERN.search(en_name):
             return False, f"❌ 严重：包含'_field_数字'后缀，存在字段重复或命名冲突"
 
         # 警告：纯数字后缀（可能的重复）
-        if re.search(r'_\d+$', en_name) and not en_name.endswith('_3'):  # customer_category_3 这种例外
+        if self.DIGIT_SUFFIX_PATTERN.search(en_name) and not en_name.endswith('_3'):  # customer_category_3 这种例外
             # 降低评分但不完全禁止
             pass
 
         return True, ""
 
-    def check_group_consistency(self, cn_name: str, en_name: str, group: str) -> Tuple[bool, str]:
+    def check_group_consistency(self, cn_name: str, en_name: str, group: str,
+                                en_parts: Optional[List[str]] = None) -> Tuple[bool, str]:
         """
         检查分组一致性
 
+        Args:
+            en_parts: 已切分的小写英文名片段（可选，validate_mapping 会传入）
+
         Returns:
             (是否一致, 问题描述)
         """
@@ -127,11 +194,12 @@ class MappingValidator:
             return False, f"未知分组'{group}'"
 
         # 检查英文名是否包含该分组的领域术语
-        en_tokens = set(en_name.lower().split('_'))
-        group_terms = set(self.domain_terms[group])
+        group_terms = self.domain_terms[group]
 
         # 至少有一个领域术语匹配
-        if en_tokens & group_terms:
+        if en_parts is None:
+            en_parts = en_name.lower().split('_')
+        if not group_terms.isdisjoint(en_parts):
             return True, ""
 
         # 特殊情况：通用分组允许任何术语
@@ -140,10 +208,14 @@ class MappingValidator:
 
         return False, f"字段名缺少'{group}'分组的领域术语（如：{', '.join(list(group_terms)[:3])}）"
 
-    def check_semantic_accuracy(self, cn_name: str, en_name: str) -> Tuple[int, List[str]]:
+    def check_semantic_accuracy(self, cn_name: str, en_name: str,
+                                en_lower: Optional[str] = None) -> Tuple[int, List[str]]:
         """
         检查语义准确性
 
+        Args:
+            en_lower: 小写英文名（可选，validate_mapping 会传入）
+
         Returns:
             (准确度评分 0-100, 问题列表)
         """
@@ -151,24 +223,31 @@ class MappingValidator:
         issues = []
 
         # 检查关键词映射
-        for cn_keyword, expected_en in self.expected_mappings.items():
-            if cn_keyword in cn_name:
-                if expected_en not in en_name.lower():
-                    score -= 15
-                    issues.append(f"中文包含'{cn_keyword}'但英文缺少'{expected_en}'")
-
-        # 检查是否包含中文
-        if re.search(r'[\u4e00-\u9fff]', en_name):
+        if self.expected_automaton is not None:
+            hits = sorted({hit for _, hit in self.expected_automaton.iter(cn_name)})
+            keyword_hits = [(cn_keyword, expected_en) for _, cn_keyword, expected_en in hits]
+        else:
+            keyword_hits = [(k, v) for k, v in self.expected_mappings.items() if k in cn_name]
+
+        if en_lower is None:
+            en_lower = en_name.lower()
+        for cn_keyword, expected_en in keyword_hits:
+            if expected_en not in en_lower:
+                score -= 15
+                issues.append(f"中文包含'{cn_keyword}'但英文缺少'{expected_en}'")
+
+        # 检查是否包含中文（纯ASCII时无需正则）
+        if not en_name.isascii() and self.CJK_PATTERN.search(en_name):
             score -= 30
             issues.append("英文字段名包含中文字符")
 
         # 检查是否过于简化
-        if len(en_name.split('_')) == 1 and len(cn_name) > 4:
+        if '_' not in en_name and len(cn_name) > 4:
             score -= 10
             issues.append(f"中文'{cn_name}'较长但英文'{en_name}'过于简化")
 
         # 检查是否有数字后缀（可能是重复字段）
-        if re.search(r'_\d+$', en_name):
+        if self.DIGIT_SUFFIX_PATTERN.search(en_name):
             score -= 5
             issues.append("字段名有数字后缀，可能存在重复定义")
 
@@ -184,12 +263,14 @@ class MappingValidator:
         issues = []
 
         # ⚠️ 严格：保单号/批单号/证件号必须是 string（前导零/字母问题）
-        if any(keyword in cn_name for keyword in ['保单号', '批单号', '证件号', '单号']):
+        if (not self.ID_FIRST_CHARS.isdisjoint(cn_name)
+                and any(keyword in cn_name for keyword in self.ID_KEYWORDS)):
             if dtype == 'number':
                 issues.append(f"❌ 严重：'{cn_name}'标记为number，应为string（可能包含字母或前导零，number会丢失）")
 
         # ⚠️ 严格：时间/日期/起期必须为 datetime
-        if any(keyword in cn_name for keyword in ['时间', '日期', '起期', '止期', '生效', '到期']):
+        if (not self.DATETIME_FIRST_CHARS.isdisjoint(cn_name)
+                and any(keyword in cn_name for keyword in self.DATETIME_KEYWORDS)):
             if dtype != 'datetime':
                 issues.append(f"❌ 严重：'{cn_name}'应为datetime类型，实际为{dtype}")
 
@@ -199,19 +280,18 @@ class MappingValidator:
                 issues.append(f"❌ 严重：'{cn_name}'应为bool或enum类型，不应使用string（当前：{dtype}）")
 
         # ⚠️ 金额字段必须有单位标注（_yuan后缀或格式说明）
-        if any(keyword in cn_name for keyword in ['保费', '费用', '金额', '价格', '赔款', '手续费', '税']):
+        if (not self.MONEY_FIRST_CHARS.isdisjoint(cn_name)
+                and any(keyword in cn_name for keyword in self.MONEY_KEYWORDS)):
             if dtype == 'number' and not ('_yuan' in en_name or '_amount' in en_name):
                 issues.append(f"⚠️ 金额字段'{cn_name}'缺少单位标注（建议：{en_name}_yuan 或 currency_yuan格式）")
 
         # ⚠️ 比例/系数字段需要明确格式
-        if any(keyword in cn_name for keyword in ['比例', '折扣', '系数']):
-            if dtype == 'number' and not any(suffix in en_name for suffix in ['_ratio', '_percent', '_coefficient', '_rate']):
+        if (not self.FORMAT_FIRST_CHARS.isdisjoint(cn_name)
+                and any(keyword in cn_name for keyword in self.FORMAT_KEYWORDS)):
+            if dtype == 'number' and not self.FORMAT_SUFFIX_PATTERN.search(en_name):
                 issues.append(f"⚠️ '{cn_name}'缺少格式标注（建议：_percent、_ratio 或 _coefficient）")
 
-        # 评分/等级/分数不应该是单纯的度量值
-        if any(keyword in cn_name for keyword in ['评分', '等级', '分数', '级别']):
-            # 这个在 validate_mapping 中处理 role 检查
-            pass
+        # 评分/等级/分数不应该是单纯的度量值：在 validate_mapping 中处理 role 检查
 
         if issues:
             return False, '; '.join(issues)
@@ -228,11 +308,20 @@ class MappingValidator:
         Returns:
             验证结果字典
         """
-        cn_name = mapping.get('cn_name', '')
-        en_name = mapping.get('field_name', '')
-        group = mapping.get('group', 'general')
-        dtype = mapping.get('dtype', 'string')
-
+        result = self._validate_fields(
+            mapping.get('cn_name', ''),
+            mapping.get('field_name', ''),
+            mapping.get('group', 'general'),
+            mapping.get('dtype', 'string'),
+            mapping.get('role', 'dimension'),
+            mapping.get('aggregation', 'none'),
+        )
+        # 缓存中的结果是共享的，返回时复制其中的列表
+        return {k: list(v) if isinstance(v, list) else v for k, v in result.items()}
+
+    def _validate_fields(self, cn_name: str, en_name: str, group: str, dtype: str,
+                         role: str, aggregation: str) -> Dict[str, Any]:
+        """validate_mapping的检查逻辑，只依赖映射中的这几个字段（按实例缓存）"""
         result = {
             'cn_name': cn_name,
             'en_name': en_name,
@@ -245,6 +334,10 @@ class MappingValidator:
             'quality_level': 'excellent'  # excellent/good/fair/poor
         }
 
+        # 各项检查共用的英文名预处理
+        en_lower = en_name.lower()
+        en_parts = en_lower.split('_')
+
         # 1. 检查命名规范
         naming_ok, naming_issue = self.check_naming_convention(en_name)
         if not naming_ok:
@@ -256,13 +349,13 @@ class MappingValidator:
             result['issues'].append(f"命名规范: {naming_issue}")
 
         # 2. 检查分组一致性
-        group_ok, group_issue = self.check_group_consistency(cn_name, en_name, group)
+        group_ok, group_issue = self.check_group_consistency(cn_name, en_name, group, en_parts)
         if not group_ok:
             result['overall_score'] -= 15
             result['warnings'].append(f"分组一致性: {group_issue}")
 
         # 3. 检查语义准确性
-        semantic_score, semantic_issues = self.check_semantic_accuracy(cn_name, en_name)
+        semantic_score, semantic_issues = self.check_semantic_accuracy(cn_name, en_name, en_lower)
         result['overall_score'] = min(result['overall_score'], semantic_score)
         result['issues'].extend(semantic_issues)
 
@@ -273,11 +366,9 @@ class MappingValidator:
             result['issues'].append(f"类型一致性: {dtype_issue}")
 
         # 5. 🆕 检查 role 和 aggregation 合理性（专业标准）
-        role = mapping.get('role', 'dimension')
-        aggregation = mapping.get('aggregation', 'none')
-
         # ⚠️ 评分/等级/系数不应该是 measure+sum
-        if any(keyword in cn_name for keyword in ['评分', '等级', '分数', '级别', '系数']):
+        if (not self.SCORE_FIRST_CHARS.isdisjoint(cn_name)
+                and any(keyword in cn_name for keyword in self.SCORE_KEYWORDS)):
             if role == 'measure' and aggregation == 'sum':
                 result['overall_score'] -= 25
                 result['issues'].append(
@@ -286,7 +377,8 @@ class MappingValidator:
                 )
 
         # ⚠️ 比例/系数应该用 avg 而非 sum
-        if any(keyword in cn_name for keyword in ['比例', '系数', '折扣', '率']):
+        if (not self.AVG_FIRST_CHARS.isdisjoint(cn_name)
+                and any(keyword in cn_name for keyword in self.AVG_KEYWORDS)):
             if dtype == 'number' and aggregation == 'sum':
                 result['overall_score'] -= 15
                 result['warnings'].append(
@@ -294,7 +386,8 @@ class MappingValidator:
                 )
 
         # ⚠️ 保费/金额/费用应该用 sum（这个是正确的）
-        if any(keyword in cn_name for keyword in ['保费', '费用', '金额', '价格', '赔款', '手续费', '税']):
+        if (not self.MONEY_FIRST_CHARS.isdisjoint(cn_name)
+                and any(keyword in cn_name for keyword in self.MONEY_KEYWORDS)):
             if role == 'measure' and aggregation != 'sum':
                 result['warnings'].append(
                     f"⚠️ '{cn_name}'是金额字段，建议使用sum聚合"
@@ -336,11 +429,9 @@ class MappingValidator:
         remaining = cn_name
 
         # 按长度降序匹配关键词
-        sorted_keywords = sorted(self.expected_mappings.keys(), key=len, reverse=True)
-
-        for keyword in sorted_keywords:
+        for keyword, expected_en in self.sorted_expected:
             if keyword in remaining:
-                tokens.append(self.expected_mappings[keyword])
+                tokens.append(expected_en)
                 remaining = remaining.replace(keyword, '', 1)
 
         if tokens:
@@ -458,7 +549,7 @@ class MappingValidator:
                 report_lines.append(f"\n*（仅显示前20个，共{len(stats['needs_review'])}个需要审核）*\n")
 
         # 高质量映射示例
-        excellent_mappings = [r for r in results if r['quality_level'] == 'excellent'][:10]
+        excellent_mappings = list(islice((r for r in results if r['quality_level'] == 'excellent'), 10))
         if excellent_mappings:
             report_lines.append("## ✅ 优秀映射示例（前10个）\n")
             report_lines.append("| 中文字段 | 英文字段 | 分组 | 类型 | 评分 |")
@@ -499,9 +590,16 @@ if __name__ == '__main__':
     mapping_file = Path(sys.argv[1])
     report_path = Path(sys.argv[2]) if len(sys.argv) > 2 else None
 
-    # 读取映射文件
-    with open(mapping_file, 'r', encoding='utf-8') as f:
-        mappings = json.load(f)
+    # 读取映射文件（orjson不接受NaN等json模块允许的写法，解析失败时交给json模块）
+    mappings = None
+    if ORJSON_AVAILABLE:
+        try:
+            mappings = orjson.loads(mapping_file.read_bytes())
+        except orjson.JSONDecodeError:
+            pass
+    if mappings is None:
+        with open(mapping_file, 'r', encoding='utf-8') as f:
+            mappings = json.load(f)
 
     # 验证
     validator = MappingValidator()
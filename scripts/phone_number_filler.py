@@ -7,13 +7,26 @@
 """
 
 import os
+import re
 import sys
-import random
 import argparse
+import numpy as np
 import pandas as pd
 from pathlib import Path
 from typing import List, Optional, Tuple
 
+import csv_reader  # CSV读取（与分析引擎共用）
+
+# 可选：XlsxWriter（写Excel比openpyxl更快），不可用时使用openpyxl
+# 关闭URL自动识别，保证文本单元格原样写出（与openpyxl一致）
+try:
+    import xlsxwriter  # noqa: F401
+    EXCEL_WRITER_ENGINE = 'xlsxwriter'
+    EXCEL_WRITER_KWARGS = {'options': {'strings_to_urls': False}}
+except ImportError:
+    EXCEL_WRITER_ENGINE = 'openpyxl'
+    EXCEL_WRITER_KWARGS = {}
+
 
 class PhoneNumberFiller:
     """手机号码自动填充器"""
@@ -24,9 +37,19 @@ class PhoneNumberFiller:
         'phone', 'mobile', 'tel', 'telephone', 'contact'
     ]
 
+    # 预编译的关键词匹配（对小写后的列名做一次扫描，等价于逐个 in 判断）
+    PHONE_KEYWORD_PATTERN = re.compile('|'.join(map(re.escape, PHONE_KEYWORDS)))
+
     # 空值的各种表示形式
     EMPTY_VALUES = ['', 'nan', 'none', 'null', '无', '空', 'n/a', 'na']
 
+    # 按CSV读写的文件后缀
+    CSV_SUFFIXES = frozenset({'.csv', '.txt'})
+
+    # 超过该大小的CSV分块流式处理（非预览模式），每块行数为 CSV_CHUNK_SIZE
+    CSV_STREAM_MIN_BYTES = 256 * 1024 * 1024
+    CSV_CHUNK_SIZE = 200_000
+
     def __init__(self, prefix: str = '100'):
         """
         初始化填充器
@@ -42,6 +65,9 @@ class PhoneNumberFiller:
             raise ValueError("手机号码必须以1开头")
 
         self.prefix = prefix
+        # 批量生成时直接在整数上拼接前缀：前缀以1开头，加8位后缀恰好11位
+        self.prefix_base = int(prefix) * 10 ** 8
+        self.rng = np.random.default_rng()
         print(f"📱 使用号段: {prefix}xxxxxxxx (中国未启用的{prefix[0:3]}号段)")
 
     def generate_phone_number(self) -> str:
@@ -52,13 +78,34 @@ class PhoneNumberFiller:
         Returns:
             11位手机号码字符串
         """
-        # 生成8位随机数字
-        suffix = ''.join([str(random.randint(0, 9)) for _ in range(8)])
-        return f"{self.prefix}{suffix}"
+        # 一次抽取8位随机后缀（与批量生成共用同一个随机数生成器）
+        suffix = int(self.rng.integers(0, 10 ** 8))
+        return f"{self.prefix}{suffix:08d}"
+
+    def generate_phone_numbers(self, count: int) -> List[str]:
+        """
+        批量生成11位随机手机号码（一次性抽取所有8位后缀）
+
+        Args:
+            count: 生成数量
+
+        Returns:
+            手机号码字符串列表
+        """
+        suffixes = self.rng.integers(0, 10 ** 8, size=count)
+        return (self.prefix_base + suffixes).astype('U11').tolist()
 
     def is_csv_file(self, file_path: Path) -> bool:
         """检测是否为CSV文件"""
-        return file_path.suffix.lower() in ['.csv', '.txt']
+        return file_path.suffix.lower() in self.CSV_SUFFIXES
+
+    def read_csv(self, file_path: Path) -> pd.DataFrame:
+        """
+        读取CSV文件，所有列均按字符串读取（优先使用PyArrow多线程解析）
+
+        结果会整表写回，csv_reader只在能与pandas逐格一致时使用PyArrow
+        """
+        return csv_reader.read_csv(file_path)
 
     def detect_phone_fields(self, df: pd.DataFrame) -> List[str]:
         """
@@ -73,9 +120,8 @@ class PhoneNumberFiller:
         phone_fields = []
 
         for col in df.columns:
-            col_lower = str(col).lower()
             # 检查列名是否包含手机号关键词
-            if any(keyword in col_lower for keyword in self.PHONE_KEYWORDS):
+            if self.PHONE_KEYWORD_PATTERN.search(str(col).lower()):
                 phone_fields.append(col)
 
         return phone_fields
@@ -102,6 +148,25 @@ class PhoneNumberFiller:
 
         return False
 
+    def empty_mask(self, series: pd.Series) -> pd.Series:
+        """
+        批量判断一列中的空值（与逐个调用 is_empty 结果一致）
+
+        Args:
+            series: 要检查的列
+
+        Returns:
+            布尔掩码，True 表示为空
+        """
+        try:
+            # 非字符串元素经 .str 处理后为 NaN，不会命中 EMPTY_VALUES
+            normalized = series.str.strip().str.lower()
+        except AttributeError:
+            # 列中没有字符串（如数值列、全空列），逐个判断
+            return series.apply(self.is_empty).astype(bool)
+
+        return series.isna() | normalized.isin(self.EMPTY_VALUES)
+
     def count_empty_phones(self, df: pd.DataFrame, field: str) -> int:
         """
         统计字段中的空值数量
@@ -113,13 +178,14 @@ class PhoneNumberFiller:
         Returns:
             空值数量
         """
-        return df[field].apply(self.is_empty).sum()
+        return int(self.empty_mask(df[field]).sum())
 
     def fill_phone_numbers(
         self,
         df: pd.DataFrame,
         field: str,
-        preview: bool = False
+        preview: bool = False,
+        empty_mask: Optional[pd.Series] = None
     ) -> Tuple[pd.DataFrame, int]:
         """
         填充手机号码字段的空值
@@ -128,19 +194,21 @@ class PhoneNumberFiller:
             df: DataFrame对象
             field: 要填充的字段名
             preview: 是否为预览模式（不实际修改）
+            empty_mask: 该字段已算好的空值掩码（可选，省去重复计算）
 
         Returns:
-            (修改后的DataFrame, 填充数量)
+            (修改后的DataFrame, 填充数量)；未修改的列与输入共享数据
         """
         if field not in df.columns:
             raise ValueError(f"字段 '{field}' 不存在于数据中")
 
-        # 复制DataFrame以避免修改原数据
-        result_df = df.copy()
+        # 浅复制DataFrame：填充时整列替换目标字段，不会修改原数据，也不必深拷贝其余列
+        result_df = df.copy(deep=False)
 
         # 统计空值数量
-        empty_mask = result_df[field].apply(self.is_empty)
-        fill_count = empty_mask.sum()
+        if empty_mask is None:
+            empty_mask = self.empty_mask(result_df[field])
+        fill_count = int(empty_mask.sum())
 
         if fill_count == 0:
             print(f"✅ 字段 '{field}' 没有空值，无需填充")
@@ -150,19 +218,112 @@ class PhoneNumberFiller:
             print(f"🔍 预览模式: 将填充 {fill_count} 个空值")
             # 显示前5个要填充的示例
             sample_indices = result_df[empty_mask].head(5).index
-            for idx in sample_indices:
-                sample_phone = self.generate_phone_number()
+            sample_phones = self.generate_phone_numbers(len(sample_indices))
+            for idx, sample_phone in zip(sample_indices, sample_phones):
                 print(f"   行 {idx+2}: [空] → {sample_phone}")
             return result_df, fill_count
 
-        # 实际填充
-        for idx in result_df[empty_mask].index:
-            result_df.at[idx, field] = self.generate_phone_number()
+        # 实际填充：整列替换，不修改原数据
+        result_df[field] = self.fill_series(result_df[field], empty_mask)
 
         print(f"✅ 成功填充 {fill_count} 个手机号码")
 
         return result_df, fill_count
 
+    def fill_series(self, series: pd.Series, empty_mask: pd.Series) -> pd.Series:
+        """
+        返回按掩码填充了随机号码的列副本（一次生成全部号码并整体写入）
+
+        Args:
+            series: 要填充的列
+            empty_mask: 空值掩码
+
+        Returns:
+            填充后的新列
+        """
+        filled = series.copy()
+        filled.loc[empty_mask] = self.generate_phone_numbers(int(empty_mask.sum()))
+        return filled
+
+    def print_field_stats(self, field: str, total_rows: int, empty_count: int):
+        """打印字段的空值统计"""
+        print(f"\n📊 字段 '{field}' 统计:")
+        print(f"   总行数: {total_rows}")
+        print(f"   空值数: {empty_count}")
+        print(f"   空值率: {empty_count/total_rows*100:.2f}%")
+
+    def read_csv_chunks(self, file_path: Path):
+        """按 CSV_CHUNK_SIZE 行分块读取CSV（与 load_file 相同的读取参数）"""
+        return pd.read_csv(file_path, dtype=str, encoding='utf-8-sig', chunksize=self.CSV_CHUNK_SIZE)
+
+    def fill_csv_in_chunks(
+        self,
+        file_path: Path,
+        phone_fields: List[str],
+        output_path: Optional[Path] = None
+    ) -> dict:
+        """
+        分块流式填充大CSV文件，内存占用只与块大小有关
+
+        第一遍只统计空值，第二遍逐块填充并追加写出。
+
+        Args:
+            file_path: 输入CSV路径
+            phone_fields: 要填充的字段
+            output_path: 输出文件路径（可选，需为CSV）
+
+        Returns:
+            处理结果字典（与 process_file 一致）
+        """
+        total_rows = 0
+        empty_counts = dict.fromkeys(phone_fields, 0)
+        for chunk in self.read_csv_chunks(file_path):
+            total_rows += len(chunk)
+            for phone_field in phone_fields:
+                empty_counts[phone_field] += int(self.empty_mask(chunk[phone_field]).sum())
+
+        for phone_field in phone_fields:
+            self.print_field_stats(phone_field, total_rows, empty_counts[phone_field])
+
+        total_filled = sum(empty_counts.values())
+        if total_filled == 0:
+            return {
+                'success': True,
+                'message': '没有需要填充的空值',
+                'filled_count': 0
+            }
+
+        if output_path is None:
+            output_path = self.default_output_path(file_path)
+        print(f"💾 正在分块写出文件: {output_path.name}")
+
+        # 先写到同目录的临时文件，全部块写完后再替换目标文件，
+        # 输出路径与输入相同时第二遍读取的仍是完整的原文件
+        tmp_path = output_path.with_name(f'{output_path.name}.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8-sig', newline='') as f:
+                for i, chunk in enumerate(self.read_csv_chunks(file_path)):
+                    for phone_field in phone_fields:
+                        empty_mask = self.empty_mask(chunk[phone_field])
+                        if empty_mask.any():
+                            chunk[phone_field] = self.fill_series(chunk[phone_field], empty_mask)
+                    chunk.to_csv(f, index=False, header=(i == 0))
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+        print(f"✅ 成功填充 {total_filled} 个手机号码")
+        print(f"✅ 文件已保存: {output_path}")
+
+        return {
+            'success': True,
+            'message': f'成功填充 {total_filled} 个手机号码',
+            'filled_count': total_filled,
+            'output_path': str(output_path),
+            'phone_fields': phone_fields
+        }
+
     def load_file(self, file_path: Path, sheet_name: Optional[str] = None) -> pd.DataFrame:
         """
         加载Excel或CSV文件
@@ -178,7 +339,7 @@ class PhoneNumberFiller:
 
         if self.is_csv_file(file_path):
             # CSV文件
-            df = pd.read_csv(file_path, dtype=str, encoding='utf-8-sig')
+            df = self.read_csv(file_path)
             print(f"   格式: CSV, 行数: {len(df)}, 列数: {len(df.columns)}")
         else:
             # Excel文件
@@ -191,6 +352,10 @@ class PhoneNumberFiller:
 
         return df
 
+    def default_output_path(self, original_path: Path) -> Path:
+        """默认输出路径：原文件名加 _filled 后缀"""
+        return original_path.parent / f"{original_path.stem}_filled{original_path.suffix}"
+
     def save_file(
         self,
         df: pd.DataFrame,
@@ -212,9 +377,7 @@ class PhoneNumberFiller:
         """
         # 如果没有指定输出路径，生成默认路径
         if output_path is None:
-            stem = original_path.stem
-            suffix = original_path.suffix
-            output_path = original_path.parent / f"{stem}_filled{suffix}"
+            output_path = self.default_output_path(original_path)
 
         print(f"💾 正在保存文件: {output_path.name}")
 
@@ -223,12 +386,13 @@ class PhoneNumberFiller:
             df.to_csv(output_path, index=False, encoding='utf-8-sig')
         else:
             # 保存为Excel
-            if sheet_name:
-                # 如果指定了工作表，需要保留其他工作表
-                with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
+            with pd.ExcelWriter(output_path, engine=EXCEL_WRITER_ENGINE,
+                                engine_kwargs=EXCEL_WRITER_KWARGS) as writer:
+                if sheet_name:
+                    # 如果指定了工作表，需要保留其他工作表
                     df.to_excel(writer, sheet_name=sheet_name, index=False)
-            else:
-                df.to_excel(output_path, index=False, engine='openpyxl')
+                else:
+                    df.to_excel(writer, index=False)
 
         print(f"✅ 文件已保存: {output_path}")
         return output_path
@@ -258,14 +422,31 @@ class PhoneNumberFiller:
         """
         try:
             file_path = Path(file_path)
-            if not file_path.exists():
+            # 一次stat同时判断是否存在并取得文件大小
+            try:
+                file_size = file_path.stat().st_size
+            except (FileNotFoundError, NotADirectoryError):
                 return {
                     'success': False,
                     'message': f'文件不存在: {file_path}'
                 }
 
+            output = Path(output_path) if output_path else None
+
+            # 大CSV（非预览、输出也为CSV）分块流式处理：这里只读表头
+            stream_csv = (
+                not preview
+                and self.is_csv_file(file_path)
+                and (output is None or self.is_csv_file(output))
+                and file_size >= self.CSV_STREAM_MIN_BYTES
+            )
+
             # 加载文件
-            df = self.load_file(file_path, sheet_name)
+            if stream_csv:
+                print(f"📂 正在分块读取文件: {file_path.name}")
+                df = pd.read_csv(file_path, dtype=str, encoding='utf-8-sig', nrows=0)
+            else:
+                df = self.load_file(file_path, sheet_name)
 
             # 确定要处理的字段
             if field:
@@ -292,17 +473,20 @@ class PhoneNumberFiller:
                     'message': '请指定字段名或启用自动检测'
                 }
 
+            if stream_csv:
+                return self.fill_csv_in_chunks(file_path, phone_fields, output)
+
             # 处理每个检测到的字段
             total_filled = 0
             for phone_field in phone_fields:
-                empty_count = self.count_empty_phones(df, phone_field)
-                print(f"\n📊 字段 '{phone_field}' 统计:")
-                print(f"   总行数: {len(df)}")
-                print(f"   空值数: {empty_count}")
-                print(f"   空值率: {empty_count/len(df)*100:.2f}%")
+                # 空值掩码只计算一次，统计和填充共用
+                empty_mask = self.empty_mask(df[phone_field])
+                empty_count = int(empty_mask.sum())
+                self.print_field_stats(phone_field, len(df), empty_count)
 
                 if empty_count > 0:
-                    df, filled = self.fill_phone_numbers(df, phone_field, preview=preview)
+                    df, filled = self.fill_phone_numbers(df, phone_field, preview=preview,
+                                                         empty_mask=empty_mask)
                     total_filled += filled
 
             if total_filled == 0:
@@ -314,7 +498,6 @@ class PhoneNumberFiller:
 
             # 保存文件（非预览模式）
             if not preview:
-                output = Path(output_path) if output_path else None
                 saved_path = self.save_file(df, file_path, output, sheet_name)
 
                 return {
@@ -0,0 +1,22 @@
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_DIR / 'scripts'))
+
+import analyzer  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def excel_analyzer():
+    return analyzer.ExcelAnalyzer()
+
+
+@pytest.fixture
+def skill_dir(tmp_path):
+    """映射库的临时副本（分析时学习到的映射写入这里，不改动仓库中的custom.json）"""
+    shutil.copytree(REPO_DIR / 'field_mappings', tmp_path / 'skill' / 'field_mappings')
+    return tmp_path / 'skill'
@@ -0,0 +1,165 @@
+import openpyxl
+import pandas as pd
+import pytest
+
+import analyzer
+import csv_reader
+
+CSV_CASES = {
+    'duplicate_header': '名称,名称,编码\na,b,007\nc,d,008\n',
+    'blank_header': '名称,,编码\na,b,007\nc,d,008\n',
+    'blank_lines': '名称,金额\na,1\n\nb,2\n  \nc,3\n',
+}
+
+
+def csv_engines():
+    engines = ['pandas']
+    if csv_reader.PYARROW_AVAILABLE:
+        engines.append('pyarrow')
+    if analyzer.POLARS_AVAILABLE:
+        engines.append('polars')
+    return engines
+
+
+def use_csv_engine(monkeypatch, excel_analyzer, engine):
+    monkeypatch.setattr(excel_analyzer, 'use_polars', engine == 'polars')
+    monkeypatch.setattr(csv_reader, 'PYARROW_AVAILABLE', csv_reader.PYARROW_AVAILABLE and engine != 'pandas')
+
+
+def cells(df: pd.DataFrame) -> list:
+    return df.astype(object).where(df.notna(), None).values.tolist()
+
+
+@pytest.fixture
+def csv_file(tmp_path, request):
+    path = tmp_path / f'{request.param}.csv'
+    path.write_text(CSV_CASES[request.param], encoding='utf-8')
+    return path
+
+
+@pytest.mark.parametrize('engine', csv_engines())
+@pytest.mark.parametrize('csv_file', sorted(CSV_CASES), indirect=True)
+def test_read_csv_matches_pandas(excel_analyzer, monkeypatch, engine, csv_file):
+    use_csv_engine(monkeypatch, excel_analyzer, engine)
+    expected = pd.read_csv(csv_file, dtype=str, encoding='utf-8-sig')
+
+    got = excel_analyzer.read_csv(csv_file)
+
+    assert list(got.columns) == list(expected.columns)
+    assert cells(got) == cells(expected)
+
+
+@pytest.mark.parametrize('engine', csv_engines())
+@pytest.mark.parametrize('csv_file', sorted(CSV_CASES), indirect=True)
+def test_load_sheet_matches_pandas_engine(excel_analyzer, monkeypatch, engine, csv_file):
+    use_csv_engine(monkeypatch, excel_analyzer, 'pandas')
+    expected = excel_analyzer.load_sheet(csv_file)
+
+    use_csv_engine(monkeypatch, excel_analyzer, engine)
+    got = excel_analyzer.load_sheet(csv_file)
+
+    assert list(got.columns) == list(expected.columns)
+    assert got.dtypes.tolist() == expected.dtypes.tolist()
+    assert cells(got) == cells(expected)
+
+
+@pytest.mark.parametrize('engine', csv_engines())
+def test_analyze_csv_with_duplicate_header(skill_dir, monkeypatch, engine, tmp_path):
+    path = tmp_path / 'dup.csv'
+    path.write_text('名称,名称,\n a ,007,x\nb,008,y\n', encoding='utf-8')
+    excel_analyzer = analyzer.ExcelAnalyzer(skill_dir)
+    use_csv_engine(monkeypatch, excel_analyzer, engine)
+
+    result = excel_analyzer.analyze_excel(str(path), str(tmp_path / 'out'))
+
+    assert result['success'], result['message']
+    df = excel_analyzer.load_sheet(path)
+    assert list(df.columns) == ['名称', '名称.1', 'Unnamed: 2']
+    assert df['名称.1'].tolist() == ['007', '008']
+
+
+def test_load_sheet_keeps_whitespace_excel_cells(excel_analyzer, tmp_path):
+    # openpyxl写出的只含空白的单元格，calamine会读成空值
+    path = tmp_path / 'ws.xlsx'
+    workbook = openpyxl.Workbook()
+    workbook.active.title = 'Sheet1'
+    for value in ['名称', 'a', '  ', 'b', 'c']:
+        workbook.active.append([value])
+    workbook.save(path)
+
+    df = excel_analyzer.load_sheet(path, 'Sheet1')
+    summary = excel_analyzer.summarize_columns(df)['名称']
+
+    assert df['名称'].tolist() == ['a', '', 'b', 'c']
+    assert (summary['null'], summary['unique']) == (0, 4)
+
+
+def test_load_sheet_all_null_column_is_float(excel_analyzer, tmp_path):
+    path = tmp_path / 'empty.csv'
+    path.write_text('名称,备注,金额\n a ,,\nb,,\n', encoding='utf-8')
+
+    df = excel_analyzer.load_sheet(path)
+    entry, _ = excel_analyzer.build_field_entry('备注', excel_analyzer.summarize_columns(df)['备注'])
+
+    assert df.dtypes.tolist() == [object, 'float64', 'float64']
+    assert (entry['dtype'], entry['role'], entry['aggregation']) == ('number', 'measure', 'sum')
+
+
+def sorted_scan(excel_analyzer, text):
+    tokens = []
+    for ph, tk in excel_analyzer.sorted_phrases:
+        if ph in text and tk not in tokens:
+            tokens.append(tk)
+            text = text.replace(ph, '')
+    return ('_'.join(tokens), True) if tokens else ('unknown_field', False)
+
+
+def joined_phrase_names(excel_analyzer):
+    """把一个短语插入另一个短语中间：删除内层短语后，外层短语才会出现"""
+    phrases = [ph for ph, _ in excel_analyzer.sorted_phrases]
+    names = ['投保确刷新时间认时间']
+    for outer in phrases[:20]:
+        for inner in phrases[-20:]:
+            cut = len(outer) // 2
+            names.append(outer[:cut] + inner + outer[cut:])
+    return names
+
+
+def test_match_phrases_matches_sorted_scan(excel_analyzer):
+    for name in joined_phrase_names(excel_analyzer):
+        assert excel_analyzer.match_phrases.__wrapped__(name) == sorted_scan(excel_analyzer, name), name
+
+
+def test_read_json_accepts_nan_literals(tmp_path):
+    path = tmp_path / 'nan.json'
+    path.write_text('{"mappings": {"甲": {"en_name": "a", "score": NaN}}}', encoding='utf-8')
+
+    manager = analyzer.FieldMappingManager(tmp_path)
+
+    assert manager.read_json(path)['mappings']['甲']['en_name'] == 'a'
+
+
+def test_analyze_multi_sheet_workbook(skill_dir, tmp_path):
+    path = tmp_path / 'multi.xlsx'
+    with pd.ExcelWriter(path) as writer:
+        pd.DataFrame({'签单保费': ['1', '2', '3']}).to_excel(writer, sheet_name='first', index=False)
+        pd.DataFrame({'名称': ['a', 'b'], '备注': ['x', 'y']}).to_excel(writer, sheet_name='second', index=False)
+
+    result = analyzer.ExcelAnalyzer(skill_dir).analyze_excel(str(path), str(tmp_path / 'out'))
+
+    assert result['success'], result['message']
+    assert (result['total_rows'], result['total_cols']) == (5, 3)
+
+
+@pytest.mark.parametrize('engine', csv_engines())
+def test_load_sheet_header_only_csv(excel_analyzer, monkeypatch, engine, tmp_path):
+    path = tmp_path / 'header.csv'
+    path.write_text('签单保费,起保日期,名称\n', encoding='utf-8')
+    use_csv_engine(monkeypatch, excel_analyzer, engine)
+
+    df = excel_analyzer.load_sheet(path)
+    entry, _ = excel_analyzer.build_field_entry('签单保费', excel_analyzer.summarize_columns(df)['签单保费'])
+
+    assert len(df) == 0
+    assert pd.api.types.is_numeric_dtype(df['签单保费'])
+    assert (entry['role'], entry['aggregation']) == ('measure', 'sum')
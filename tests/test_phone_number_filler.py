@@ -0,0 +1,40 @@
+import pandas as pd
+
+from phone_number_filler import PhoneNumberFiller
+
+CSV_TEXT = 'name,手机号\nx,\ny,13800000000\nz,\n'
+
+
+def test_stream_csv_onto_itself(tmp_path):
+    path = tmp_path / 'contacts.csv'
+    path.write_text(CSV_TEXT, encoding='utf-8')
+    filler = PhoneNumberFiller()
+    filler.CSV_STREAM_MIN_BYTES = 0
+
+    result = filler.process_file(str(path), output_path=str(path))
+
+    assert result['success'], result['message']
+    assert result['filled_count'] == 2
+    df = pd.read_csv(path, dtype=str, encoding='utf-8-sig')
+    assert df['name'].tolist() == ['x', 'y', 'z']
+    assert df['手机号'][1] == '13800000000'
+    assert df['手机号'].str.fullmatch(r'100\d{8}').tolist() == [True, False, True]
+    assert [p.name for p in tmp_path.iterdir()] == ['contacts.csv']
+
+
+def test_stream_matches_in_memory(tmp_path):
+    rows = ''.join(f'{i},{"" if i % 3 else "13800000000"},00{i}\n' for i in range(50))
+    path = tmp_path / 'big.csv'
+    path.write_text('id,手机号,编码\n' + rows, encoding='utf-8')
+
+    streamed = PhoneNumberFiller()
+    streamed.CSV_STREAM_MIN_BYTES = 0
+    streamed.process_file(str(path), output_path=str(tmp_path / 'streamed.csv'))
+    in_memory = PhoneNumberFiller()
+    in_memory.process_file(str(path), output_path=str(tmp_path / 'in_memory.csv'))
+
+    a = pd.read_csv(tmp_path / 'streamed.csv', dtype=str)
+    b = pd.read_csv(tmp_path / 'in_memory.csv', dtype=str)
+    assert a.drop(columns='手机号').equals(b.drop(columns='手机号'))
+    assert (a['手机号'].isna() | b['手机号'].isna()).sum() == 0
+    assert (a['手机号'] == '13800000000').equals(b['手机号'] == '13800000000')